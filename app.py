@@ -1,7 +1,13 @@
+import time
+_run_started = time.perf_counter()
+
+import sys
+import importlib
 import streamlit as st
-from PIL import Image
-from datetime import datetime
-from features import dashboard, log_entry, export, renter_activity, view_expenses
+
+from utils import tracing
+
+trace = tracing.start_run("rerun")
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -36,7 +42,7 @@ st.markdown(
 )
 
 # --- Sidebar Layout ---
-st.sidebar.image(Image.open("assets/favicon.png"), use_container_width=True)
+st.sidebar.image("assets/favicon.png", use_container_width=True)
 st.sidebar.title("📘 OPP Finance Tracker")
 
 page = st.sidebar.radio(
@@ -54,17 +60,58 @@ with st.sidebar.expander("🧭 App Info", expanded=True):
     st.markdown("**Version:** 1.3.0  \n**Updated:** May 2025")
     st.markdown("Built by: **Oceanview Property Partners**")
 
-# --- Route Pages ---
+# --- Resume receipt uploads a previous process left unfinished (once per process) ---
+from utils.upload_queue import get_worker_pool
+
+get_worker_pool()
+
+# --- Route Pages (modules are imported only when selected) ---
 routes = {
-    "Dashboard": dashboard,
-    "Rental Entry": log_entry,
-    "Renter Activity": renter_activity,
-    "View Expenses": view_expenses,
-    "Data Export": export
+    "Dashboard": "features.dashboard",
+    "Rental Entry": "features.log_entry",
+    "Renter Activity": "features.renter_activity",
+    "View Expenses": "features.view_expenses",
+    "Data Export": "features.export"
 }
 
+# --- Process-wide startup timings (first run after a cold start) ---
+@st.cache_resource(show_spinner=False)
+def _startup_report() -> dict:
+    return {}
+
+sidebar_ms = (time.perf_counter() - _run_started) * 1000
+import_ms = render_ms = 0.0
+
 # --- Load Selected Page with Error Catch ---
 try:
-    routes[page].show()
+    started = time.perf_counter()
+    with tracing.span("page.import", page=page):
+        page_module = importlib.import_module(routes[page])
+    import_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with tracing.span("page.render", page=page):
+        page_module.show()
+    render_ms = (time.perf_counter() - started) * 1000
 except Exception as e:
     st.error(f"❌ Page load failed: {type(e).__name__} — {e}")
+
+# --- Startup-time report ---
+report = _startup_report()
+if not report:
+    report.update(page=page, sidebar_ms=sidebar_ms, import_ms=import_ms, render_ms=render_ms)
+
+with st.sidebar.expander("⏱ Load Times"):
+    heavy = [m for m in ("matplotlib", "gspread", "googleapiclient", "PIL") if m in sys.modules]
+    st.markdown(
+        f"**Cold start** ({report['page']}): sidebar {report['sidebar_ms']:.0f} ms · "
+        f"import {report['import_ms']:.0f} ms · render {report['render_ms']:.0f} ms  \n"
+        f"**This run** ({page}): sidebar {sidebar_ms:.0f} ms · "
+        f"import {import_ms:.0f} ms · render {render_ms:.0f} ms  \n"
+        f"**Loaded:** {', '.join(heavy) or 'none'}"
+    )
+
+# --- Per-rerun diagnostics (spans, API calls, cache hits) ---
+from features import diagnostics
+
+diagnostics.show(trace)
@@ -0,0 +1,252 @@
+"""Benchmark the data layer and page renders against the offline backend.
+
+    python -m benchmarks.run --sizes 1000 10000 100000 --pages
+    python -m benchmarks.run --sizes 1000000 --repeat 1
+    python -m benchmarks.run --compare benchmarks/results/<earlier>.json
+
+Sizes are rows per tab (each year has an income and an expense tab). Times are
+the median of --repeat runs; peak memory comes from one extra run under
+tracemalloc, which is not timed. Results are written to benchmarks/results/.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+SHEET_ID = "benchmark-sheet"
+PAGES = ["Dashboard", "Rental Entry", "Renter Activity", "View Expenses", "Data Export"]
+
+# --- Offline settings; installed before any utils module reads them ---
+def configure(workdir: str, years: list, latency_ms: float) -> None:
+    os.environ["OPP_CACHE_DIR"] = os.path.join(workdir, "cache")
+
+    from utils import cache, settings
+
+    settings.use_provider(settings.DictSettings({
+        "gsheet_id": SHEET_ID,
+        "gdrive_folder_id": "benchmark-root",
+        "years": years,
+        "income_tabs": [f"{year} OPP Income" for year in years],
+        "expense_tabs": [f"{year} OPP Expenses" for year in years],
+        "payment_statuses": ["Paid", "PMT due", "Downpayment received"],
+        "storage_backend": "local",
+        "local_backend_dir": os.path.join(workdir, "backend"),
+        "local_latency_ms": latency_ms,
+    }))
+    cache.use_backend("memory")
+
+# --- Timing / memory helpers ---
+def measure(fn, repeat: int, setup=None) -> dict:
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_s": round(statistics.median(times), 6),
+        "min_s": round(min(times), 6),
+        "peak_mb": round(peak / 2**20, 3),
+    }
+
+def clear_mirror() -> None:
+    from utils import ledger_mirror
+
+    ledger_mirror.clear()
+
+# --- Data-layer cases for one ledger size ---
+def bench_helpers(rows: int, years: list, repeat: int) -> list:
+    from utils import cache
+    from utils.aggregates import load_cube
+    from utils.dashboard_helpers import load_dashboard_data
+    from utils.export_helpers import (
+        build_export_model, generate_excel_export, generate_zip_export, generate_parquet_export
+    )
+    from utils.google_sheets import load_sheet_as_df, load_sheets_as_dfs
+    from utils.ledger import load_ledger, load_ledgers
+    from utils.renter_helpers import REQUIRED_COLUMNS, diff_edited_cells
+    from utils.vocabulary import build_vocabulary
+
+    year = years[-1]
+    income_tab = f"{year} OPP Income"
+
+    def clear_frames():
+        for fn in (load_sheet_as_df, load_sheets_as_dfs):
+            fn.clear()
+
+    def clear_ledger():
+        for fn in (load_ledger, load_ledgers, load_cube):
+            fn.clear()
+
+    def cold():
+        cache.clear_all()
+        clear_mirror()
+
+    cases = [
+        ("load_sheet_as_df[cold]", lambda: load_sheet_as_df(SHEET_ID, income_tab), cold),
+        ("load_sheet_as_df[mirror]", lambda: load_sheet_as_df(SHEET_ID, income_tab), clear_frames),
+        ("load_sheet_as_df[cached]", lambda: load_sheet_as_df(SHEET_ID, income_tab), None),
+        ("load_dashboard_data", lambda: load_dashboard_data(year, "Islamorada"), clear_ledger),
+    ]
+
+    income_df, expense_df = load_ledger(year)
+    model = build_export_model(income_df, expense_df)
+    cases += [
+        ("build_export_model", lambda: build_export_model(income_df, expense_df), None),
+        ("generate_excel_export", lambda: generate_excel_export(model), None),
+        ("generate_zip_export", lambda: generate_zip_export(model, year), None),
+    ]
+    try:
+        import pyarrow  # noqa: F401
+        cases.append(("generate_parquet_export", lambda: generate_parquet_export(model, year), None))
+    except ImportError:
+        pass
+
+    # edit_renter_form's diff: 1% of rows touched in one column
+    renters = load_sheet_as_df(SHEET_ID, income_tab)
+    edited = renters.copy()
+    touched = edited.index[:: 100]
+    edited.loc[touched, "Notes"] = "edited"
+    cases.append(("diff_edited_cells", lambda: diff_edited_cells(renters, edited, REQUIRED_COLUMNS), None))
+    cases.append(("build_vocabulary", lambda: build_vocabulary(renters), None))
+
+    results = []
+    for name, fn, setup in cases:
+        result = {"case": name, "rows": rows, **measure(fn, repeat, setup)}
+        print(f"  {name:<28} {result['median_s'] * 1000:>10.1f} ms  {result['peak_mb']:>9.1f} MB")
+        results.append(result)
+    return results
+
+# --- Full page renders through AppTest (cold caches, then a warm rerun) ---
+def bench_pages(rows: int) -> list:
+    from streamlit.testing.v1 import AppTest
+    from utils import cache
+
+    results = []
+    for page in PAGES:
+        cache.clear_all()
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+
+        started = time.perf_counter()
+        at.run()
+        if page != PAGES[0]:
+            at.sidebar.radio[0].set_value(page).run()
+        cold_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        at.run()
+        warm_s = time.perf_counter() - started
+
+        errors = [e.value for e in at.exception] + [e.value for e in at.error]
+        result = {"case": f"page[{page}]", "rows": rows, "cold_s": round(cold_s, 6),
+                  "warm_s": round(warm_s, 6), "errors": errors}
+        print(f"  {result['case']:<28} cold {cold_s * 1000:>8.1f} ms  warm {warm_s * 1000:>8.1f} ms"
+              + (f"  ERRORS: {errors}" if errors else ""))
+        results.append(result)
+    return results
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+# --- Side-by-side with an earlier results file ---
+def compare(current: list, baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = {(r["case"], r["rows"]): r for r in json.load(f)["results"]}
+
+    print(f"\nChange vs {os.path.basename(baseline_path)} (median / cold time):")
+    for result in current:
+        before = baseline.get((result["case"], result["rows"]))
+        if not before:
+            continue
+        metric = "median_s" if "median_s" in result else "cold_s"
+        if before.get(metric):
+            change = (result[metric] - before[metric]) / before[metric] * 100
+            print(f"  {result['case']:<28} {result['rows']:>9}  {change:+7.1f}%")
+
+def main(argv=None) -> int:
+    current_year = datetime.now().year
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="Rows per tab (default: 1000 10000 100000)")
+    parser.add_argument("--years", nargs="+", default=[str(current_year - 1), str(current_year)])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pages", action="store_true", help="Also render every page through AppTest")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Simulated round-trip latency per API call")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<time>-<rev>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)  # app.py loads its assets relative to the repo root
+    with tempfile.TemporaryDirectory(prefix="opp-bench-") as workdir:
+        configure(workdir, args.years, args.latency_ms)
+        from benchmarks.synthetic import seed_ledger
+        from utils import cache
+        from utils.google_clients import get_local_backend
+
+        backend = get_local_backend()
+        results = []
+        for rows in args.sizes:
+            print(f"{rows:,} rows per tab, years {', '.join(args.years)}")
+            backend.reset()
+            clear_mirror()
+            cache.clear_all()  # frames from the previous size must not leak into this one
+            started = time.perf_counter()
+            seed_ledger(backend, SHEET_ID, args.years, rows)
+            print(f"  (seeded in {time.perf_counter() - started:.1f}s)")
+
+            results += bench_helpers(rows, args.years, args.repeat)
+            if args.pages:
+                results += bench_pages(rows)
+
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "years": args.years,
+            "repeat": args.repeat,
+            "latency_ms": args.latency_ms,
+        },
+        "results": results,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['revision']}.json"
+    )
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {path}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
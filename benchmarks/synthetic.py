@@ -0,0 +1,80 @@
+import numpy as np
+
+# --- Column layouts exactly as the app writes them (see utils/log_helpers.py) ---
+INCOME_HEADER = [
+    "Month", "Name", "Address", "City", "State", "Zip", "Phone", "Email",
+    "Check-in", "Check-out", "Property", "Income Source",
+    "Amount Owed", "Amount Received", "Balance", "Status", "Notes"
+]
+EXPENSE_HEADER = [
+    "Month", "Date", "Purchaser", "Item", "Property",
+    "Category", "Amount", "Comments", "Receipt Link"
+]
+
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+PROPERTIES = ["Islamorada", "Standish"]
+INCOME_SOURCES = ["Renter", "Airbnb", "VRBO", "Florida Rental", "FreeWheeler"]
+STATUSES = ["Paid", "PMT due", "Downpayment received"]
+CATEGORIES = [
+    "Utilities", "Maintenance", "Supplies", "Cleaning", "Fees",
+    "Marketing", "Insurance", "Capital Improvements", "Other"
+]
+PURCHASERS = ["Charlie", "Katie"]
+
+def _money(values: np.ndarray):
+    # Sheets returns formatted text, so amounts arrive as "$1,234.50"
+    return (f"${v:,.2f}" for v in values)
+
+def _dates(year: str, days: np.ndarray) -> np.ndarray:
+    return np.datetime64(f"{year}-01-01") + days.astype("timedelta64[D]")
+
+def _month_names(dates: np.ndarray) -> np.ndarray:
+    return np.array(MONTHS)[dates.astype("datetime64[M]").astype(int) % 12]
+
+# --- One tab of rows (header first), as values.batchGet would return it; generated lazily ---
+def income_values(rows: int, year: str, seed: int = 0, properties=PROPERTIES):
+    rng = np.random.default_rng(seed)
+    days = rng.integers(0, 358, rows)
+    check_in = _dates(year, days)
+    check_out = _dates(year, days + rng.integers(2, 8, rows)).astype(str)
+    owed = rng.integers(200, 4000, rows) + rng.integers(0, 100, rows) / 100
+    received = np.round(owed * rng.choice([0.0, 0.5, 1.0], rows, p=[0.1, 0.2, 0.7]), 2)
+    month = _month_names(check_in)
+    check_in = check_in.astype(str)
+    prop = rng.choice(properties, rows)
+    source = rng.choice(INCOME_SOURCES, rows)
+    status = np.where(received >= owed, "Paid", rng.choice(STATUSES[1:], rows))
+
+    yield INCOME_HEADER
+    for i, (o, r) in enumerate(zip(_money(owed), _money(received))):
+        yield [
+            month[i], f"Renter {i}", f"{i} Ocean Dr", "Key Largo", "FL", "33037",
+            "555-0100", f"renter{i}@example.com", check_in[i], check_out[i],
+            prop[i], source[i], o, r, f"${owed[i] - received[i]:,.2f}", status[i], "",
+        ]
+
+def expense_values(rows: int, year: str, seed: int = 0, properties=PROPERTIES):
+    rng = np.random.default_rng(seed + 1)
+    date = _dates(year, rng.integers(0, 365, rows))
+    month = _month_names(date)
+    date = date.astype(str)
+    amount = _money(rng.integers(5, 2500, rows) + rng.integers(0, 100, rows) / 100)
+    purchaser = rng.choice(PURCHASERS, rows)
+    prop = rng.choice(properties, rows)
+    category = rng.choice(CATEGORIES, rows)
+
+    yield EXPENSE_HEADER
+    for i, a in enumerate(amount):
+        yield [
+            month[i], date[i], purchaser[i], f"Item {i}", prop[i],
+            category[i], a, "", "",
+        ]
+
+# --- Fill a local backend with an income and an expense tab per year ---
+def seed_ledger(backend, sheet_id: str, years: list, rows: int, seed: int = 0) -> None:
+    for offset, year in enumerate(years):
+        backend.seed_tab(sheet_id, f"{year} OPP Income", income_values(rows, year, seed + offset))
+        backend.seed_tab(sheet_id, f"{year} OPP Expenses", expense_values(rows, year, seed + offset))
@@ -1,5 +1,6 @@
 import streamlit as st
 from datetime import datetime
+from utils.config import YEARS
 from utils.dashboard_helpers import (
     load_dashboard_data,
     calculate_summary_metrics,
@@ -10,7 +11,7 @@ from utils.dashboard_helpers import (
 def show():
     st.title("📊 Finance Dashboard")
 
-    years = st.secrets["years"]
+    years = YEARS
     current_year = str(datetime.now().year)
     selected_year = st.selectbox("Select Year", years, index=years.index(current_year))
 
@@ -0,0 +1,44 @@
+import json
+import pandas as pd
+import streamlit as st
+
+from utils import tracing
+
+# --- Sidebar panel: where this rerun's time went (spans), API traffic and cache hit rates ---
+def show(trace=None):
+    trace = trace or tracing.current()
+    with st.sidebar.expander("🩺 Diagnostics"):
+        if trace is None:
+            st.caption("No trace recorded for this run.")
+            return
+
+        api = tracing.api_totals(trace)
+        if api:
+            st.markdown("**🌐 API calls**")
+            st.dataframe(
+                pd.DataFrame.from_dict(api, orient="index").rename_axis("Service"),
+                use_container_width=True,
+            )
+        else:
+            st.caption("No API calls this run.")
+
+        if trace.cache:
+            hits = sum(c["hits"] for c in trace.cache.values())
+            misses = sum(c["misses"] for c in trace.cache.values())
+            st.markdown(f"**🗃 Cache:** {hits} hits · {misses} misses")
+            cache_df = pd.DataFrame.from_dict(trace.cache, orient="index").rename_axis("Function")
+            st.dataframe(cache_df.sort_values("misses", ascending=False), use_container_width=True)
+
+        summary = trace.span_summary()
+        if summary:
+            st.markdown("**⏱ Spans** (slowest first)")
+            spans_df = pd.DataFrame(summary).set_index("name").round(1)
+            st.dataframe(spans_df, use_container_width=True)
+
+        st.download_button(
+            label="⬇️ Trace (OpenTelemetry JSON)",
+            data=json.dumps(tracing.to_otel_json(trace)),
+            file_name=f"opp-trace-{trace.trace_id[:8]}.json",
+            mime="application/json",
+            key="download_trace",
+        )
@@ -1,16 +1,37 @@
 import streamlit as st
+from utils.config import YEARS
 from utils.export_helpers import (
     load_and_process_data,
+    load_available_years,
     generate_summary,
-    generate_excel_export,
-    generate_zip_export
+    ledger_fingerprint,
+    build_export_artifact,
+    build_bulk_artifact,
+    EXPORT_FORMATS
 )
 
+def _download(year: str, fingerprint: str, fmt: str, income_df, expense_df, prepare_label: str, download_label: str):
+    """Build the artifact only once asked; afterwards serve it from the cache."""
+    ready_key = f"export_ready_{fmt}"
+    if st.session_state.get(ready_key) != (year, fingerprint):
+        if not st.button(prepare_label, key=f"prepare_{fmt}"):
+            return
+        st.session_state[ready_key] = (year, fingerprint)
+
+    file_suffix, mime = EXPORT_FORMATS[fmt]
+    st.download_button(
+        label=download_label,
+        data=build_export_artifact(year, fingerprint, fmt, income_df, expense_df),
+        file_name=f"{year}_{file_suffix}",
+        mime=mime,
+        key=f"download_{fmt}"
+    )
+
 def show():
     st.title("📁 Export Financial Data")
     st.caption("Download income, expenses, and summary for your accountant or tax records.")
 
-    year = st.radio("Select Year", ["2025", "2026"], horizontal=True)
+    year = st.radio("Select Year", YEARS, horizontal=True)
 
     try:
         income_df, expense_df = load_and_process_data(year)
@@ -18,27 +39,56 @@ def show():
             st.warning("No financial data found.")
             return
 
-        summary_df = generate_summary(income_df, expense_df)
-        excel_file = generate_excel_export(income_df, expense_df, summary_df)
+        fingerprint = ledger_fingerprint(income_df, expense_df)
 
-        st.download_button(
-            label="📥 Download Excel Export",
-            data=excel_file,
-            file_name=f"{year}_financial_export.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+        _download(year, fingerprint, "xlsx", income_df, expense_df,
+                  "⚙️ Prepare Excel Export", "📥 Download Excel Export")
 
         with st.expander("📦 Need individual CSV files?"):
-            zip_file = generate_zip_export(income_df, expense_df, summary_df, year)
-            st.download_button(
-                label="Download ZIP of CSVs",
-                data=zip_file,
-                file_name=f"{year}_financial_export.zip",
-                mime="application/zip"
-            )
+            _download(year, fingerprint, "zip", income_df, expense_df,
+                      "⚙️ Prepare ZIP of CSVs", "Download ZIP of CSVs")
+
+        with st.expander("🧮 Typed data for scripts (Parquet / NDJSON)"):
+            st.caption("Keeps categories, dates and exact amounts — no re-parsing needed.")
+            _download(year, fingerprint, "parquet", income_df, expense_df,
+                      "⚙️ Prepare Parquet Export", "Download Parquet (ZIP)")
+            _download(year, fingerprint, "ndjson", income_df, expense_df,
+                      "⚙️ Prepare NDJSON Export", "Download NDJSON")
 
         with st.expander("📊 Preview Summary"):
-            st.dataframe(summary_df, use_container_width=True)
+            st.dataframe(generate_summary(income_df, expense_df), use_container_width=True)
 
     except Exception as e:
         st.error(f"❌ Failed to load or export data: {e}")
+
+    show_bulk_export()
+
+def show_bulk_export():
+    st.markdown("---")
+    st.subheader("🗂 All Years & Properties")
+    st.caption("One ZIP with a workbook and CSVs for every year and property — for tax time.")
+
+    if not st.session_state.get("bulk_export_ready") and not st.button("⚙️ Prepare Bulk Export"):
+        return
+    st.session_state["bulk_export_ready"] = True
+
+    try:
+        ledgers, missing = load_available_years(YEARS)
+        if missing:
+            st.warning(f"⚠️ Skipped {', '.join(missing)}: the year's income or expense tab couldn't be loaded.")
+        if not ledgers:
+            return
+        fingerprint = ledger_fingerprint(*(df for pair in ledgers.values() for df in pair))
+        with st.spinner("Building bulk export..."):
+            path = build_bulk_artifact(fingerprint, ledgers)
+        file_suffix, mime = EXPORT_FORMATS["bulk"]
+        with open(path, "rb") as f:
+            st.download_button(
+                label="📥 Download Bulk Export",
+                data=f,
+                file_name=file_suffix,
+                mime=mime,
+                key="download_bulk"
+            )
+    except Exception as e:
+        st.error(f"❌ Bulk export failed: {e}")
@@ -3,23 +3,9 @@ from datetime import date
 
 from utils.log_helpers import build_expense_payload, log_expense
 from utils.config import YEARS as INCOME_YEARS, PROPERTIES, SHEET_ID
-from utils.google_sheets import load_sheet_as_df
-
-@st.cache_data(ttl=600)
-def get_unique_purchasers(sheet_name):
-    try:
-        df = load_sheet_as_df(SHEET_ID, sheet_name)
-        return sorted(df["Purchaser"].dropna().unique().tolist())
-    except Exception:
-        return []
-
-@st.cache_data(ttl=600)
-def get_unique_categories(sheet_name):
-    try:
-        df = load_sheet_as_df(SHEET_ID, sheet_name)
-        return sorted(df["Category"].dropna().unique().tolist())
-    except Exception:
-        return []
+from utils.vocabulary import get_choices
+from utils.upload_queue import list_jobs, retry_failed
+from utils.google_drive import rebuild_receipt_index, ensure_year_folders
 
 def show_expense_form():
     try:
@@ -27,11 +13,12 @@ def show_expense_form():
             year = st.selectbox("Log Expense To:", INCOME_YEARS, key="expense_year")
             sheet_name = f"{year} OPP Expenses"
 
-            purchasers = get_unique_purchasers(sheet_name)
-            categories = get_unique_categories(sheet_name)
+            # Most-used values first, from the tab's vocabulary index
+            purchasers = get_choices(SHEET_ID, sheet_name, "Purchaser")
+            categories = get_choices(SHEET_ID, sheet_name, "Category")
 
             expense_date = st.date_input("Expense Date", date.today())
-            purchaser = st.selectbox("Purchaser", purchasers)
+            purchaser = st.selectbox("Purchaser", purchasers) if purchasers else st.text_input("Purchaser")
             item = st.text_input("Item/Description")
             property_selected = st.selectbox("Property", PROPERTIES)
             category = st.selectbox("Category", categories) if categories else st.text_input("Category")
@@ -44,8 +31,40 @@ def show_expense_form():
                     expense_date, purchaser, item, property_selected,
                     category, amount, comments, receipt_file
                 )
-                log_expense(sheet_name, row_dict)
+                log_expense(sheet_name, row_dict, receipt_file, expense_date)
                 st.success("✅ Expense logged successfully.")
                 st.rerun()
     except Exception as e:
         st.error(f"❌ Expense form crashed: {e}")
+
+    show_upload_status()
+
+def show_upload_status():
+    with st.expander("📤 Receipt Uploads"):
+        if st.button("🔄 Rebuild duplicate-receipt index from Drive"):
+            try:
+                st.success(f"Indexed {rebuild_receipt_index()} receipt(s).")
+            except Exception as e:
+                st.error(f"❌ Index rebuild failed: {e}")
+
+        folder_year = st.session_state.get("expense_year", INCOME_YEARS[0])
+        if st.button(f"📁 Create {folder_year} month folders in Drive"):
+            try:
+                st.success(f"{len(ensure_year_folders(folder_year))} month folder(s) ready for {folder_year}.")
+            except Exception as e:
+                st.error(f"❌ Folder setup failed: {e}")
+
+        jobs = list_jobs()
+        if not jobs:
+            st.caption("No receipt uploads yet.")
+            return
+
+        icons = {"pending": "🕗", "uploading": "⏫", "done": "✅", "failed": "❌"}
+        for job in jobs:
+            line = f"{icons.get(job['status'], '')} **{job['filename']}** → {job['tab_name']} row {job['row_number']} ({job['status']})"
+            if job["status"] != "done" and job["error"]:
+                line += f" — attempt {job['attempts']}: {job['error']}"
+            st.markdown(line)
+
+        if any(job["status"] == "failed" for job in jobs) and st.button("🔁 Retry failed uploads"):
+            st.info(f"Re-queued {retry_failed()} upload(s).")
@@ -3,22 +3,14 @@ from datetime import date
 
 from utils.log_helpers import build_income_payload, log_income
 from utils.config import YEARS as INCOME_YEARS, PAYMENT_STATUS, PROPERTIES, SHEET_ID
-from utils.google_sheets import load_sheet_as_df
-
-@st.cache_data(ttl=600)
-def get_unique_income_sources(sheet_name):
-    try:
-        df = load_sheet_as_df(SHEET_ID, sheet_name)
-        return sorted(df["Income Source"].dropna().unique().tolist())
-    except Exception:
-        return []
+from utils.vocabulary import get_choices
 
 def show_income_form():
     try:
         with st.form("income_form", clear_on_submit=True):
             year = st.selectbox("Log Income To:", INCOME_YEARS, key="income_year")
             sheet_name = f"{year} OPP Income"
-            income_sources = get_unique_income_sources(sheet_name)
+            income_sources = get_choices(SHEET_ID, sheet_name, "Income Source")
 
             booking_date = st.date_input("Booking Date", date.today())
             rental_dates = st.date_input("Rental Date Range", (date.today(), date.today()))
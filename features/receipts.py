@@ -1,10 +1,7 @@
 import streamlit as st
 from datetime import date, datetime
-import tempfile
-import os
 
-from utils.google_drive import upload_file_to_drive
-from utils.config import get_drive_folder_id
+from utils.google_drive import upload_file_to_drive, resolve_month_folder
 
 def show():
     """Upload a receipt file into the proper Google Drive folder by date."""
@@ -25,24 +22,13 @@ def show():
     if not uploaded_file:
         return  # nothing to do yet
 
-    # ─── Save temp file & Upload ─────────────────────────────────────────
-    with tempfile.NamedTemporaryFile(delete=False) as tmp:
-        tmp.write(uploaded_file.getbuffer())
-        tmp_path = tmp.name
-
+    # ─── Stream upload (no temp file) ─────────────────────────────────────
     try:
         with st.spinner("Finding Drive folder..."):
-            folder_id = get_drive_folder_id(receipt_date)
-
-        if not folder_id:
-            st.warning(
-                f"No folder configured for {receipt_date.strftime('%B %Y')}. "
-                "Receipt not uploaded."
-            )
-            return
+            folder_id = resolve_month_folder(receipt_date)
 
         with st.spinner("Uploading receipt to Drive..."):
-            file_id = upload_file_to_drive(tmp_path, uploaded_file.name, folder_id)
+            file_id = upload_file_to_drive(uploaded_file, uploaded_file.name, folder_id)
 
         st.success("✅ File successfully uploaded!")
         drive_url = f"https://drive.google.com/file/d/{file_id}/view"
@@ -51,9 +37,6 @@ def show():
     except Exception as e:
         st.error(f"Failed to upload receipt: {e}")
 
-    finally:
-        os.remove(tmp_path)
-
     # ─── Custom footer ─────────────────────────────────────────────────────
     st.markdown("---")
     last_updated = datetime.now().strftime("%B %d, %Y %I:%M %p")
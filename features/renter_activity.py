@@ -1,10 +1,11 @@
 import streamlit as st
+from utils.config import YEARS
 from utils.renter_helpers import load_renter_data, display_renter_table, edit_renter_form
 
 def show():
     st.title("📋 Renter Activity")
 
-    years = st.secrets["years"]
+    years = YEARS
     year = st.radio("Select Year", years, horizontal=True)
     sheet_name = f"{year} OPP Income"
 
@@ -0,0 +1,5 @@
+from opp.cli import main
+
+# Guarded: the bulk export's worker processes re-import this module
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,131 @@
+"""Headless entry point: `python -m opp {export,summary,sync} ...`.
+
+Settings come from utils.settings: the TOML file named by OPP_SECRETS_FILE
+(or .streamlit/secrets.toml), with OPP_<KEY> environment variables on top.
+Caches use the in-memory backend unless OPP_CACHE_BACKEND says otherwise.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def _years(args) -> list:
+    from utils.config import YEARS, DEFAULT_TAB_YEAR
+
+    if args.all_years:
+        return list(YEARS)
+    return args.year or [DEFAULT_TAB_YEAR]
+
+
+# --- export: write export files for one or more years ---
+def cmd_export(args) -> int:
+    from utils.export_helpers import (
+        EXPORT_FORMATS, build_export_model, render_export, generate_bulk_export,
+        load_all_years, load_available_years
+    )
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    years = _years(args)
+
+    if args.format == "bulk":
+        ledgers, missing = load_available_years(years)
+        if missing:
+            print(f"Skipped {', '.join(missing)}: tabs could not be loaded", file=sys.stderr)
+        if not ledgers:
+            return 1
+        file_suffix, _ = EXPORT_FORMATS["bulk"]
+        path = os.path.join(args.output_dir, file_suffix)
+        with open(path, "wb") as f:
+            generate_bulk_export(ledgers, f)
+        print(path)
+        return 0
+
+    ledgers = load_all_years(years)
+    file_suffix, _ = EXPORT_FORMATS[args.format]
+    for year in years:
+        income_df, expense_df = ledgers[year]
+        path = os.path.join(args.output_dir, f"{year}_{file_suffix}")
+        with open(path, "wb") as f:
+            f.write(render_export(build_export_model(income_df, expense_df), args.format, year))
+        print(path)
+    return 0
+
+
+# --- summary: received / still due / expenses / profit per property ---
+def cmd_summary(args) -> int:
+    from utils.config import PROPERTIES
+    from utils.dashboard_helpers import load_dashboard_data, calculate_summary_metrics
+
+    properties = args.property or PROPERTIES
+    rows = []
+    for year in _years(args):
+        for name in properties:
+            received, due, expenses, profit = calculate_summary_metrics(*load_dashboard_data(year, name))
+            rows.append({
+                "Year": year,
+                "Property": name,
+                "Received": round(float(received), 2),
+                "Still Due": round(float(due), 2),
+                "Expenses": round(float(expenses), 2),
+                "Net Profit": round(float(profit), 2),
+            })
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        import pandas as pd
+        print(pd.DataFrame(rows).to_string(index=False, float_format=lambda x: f"${x:,.2f}"))
+    return 0
+
+
+# --- sync: refresh the local ledger mirror so the app starts warm ---
+def cmd_sync(args) -> int:
+    from utils.config import SHEET_ID
+    from utils.google_sheets import load_sheets_as_dfs
+
+    tabs = tuple(tab for year in _years(args) for tab in (f"{year} OPP Income", f"{year} OPP Expenses"))
+    started = time.perf_counter()
+    dfs = load_sheets_as_dfs(SHEET_ID, tabs)
+    for tab in tabs:
+        print(f"{tab}: {len(dfs[tab])} rows")
+    print(f"Synced {len(tabs)} tabs in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m opp", description="OPP finance tools without the web app.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_years(sub):
+        group = sub.add_mutually_exclusive_group()
+        group.add_argument("--year", action="append", help="Ledger year (repeatable; default: current year)")
+        group.add_argument("--all-years", action="store_true", help="Every configured year")
+
+    export = commands.add_parser("export", help="Write export files")
+    add_years(export)
+    export.add_argument("--format", default="xlsx", choices=["xlsx", "zip", "parquet", "ndjson", "bulk"])
+    export.add_argument("--output-dir", default=".", help="Directory for the export files")
+    export.set_defaults(func=cmd_export)
+
+    summary = commands.add_parser("summary", help="Print per-property totals")
+    add_years(summary)
+    summary.add_argument("--property", action="append", help="Property name (repeatable; default: all)")
+    summary.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    summary.set_defaults(func=cmd_summary)
+
+    sync = commands.add_parser("sync", help="Refresh the local ledger mirror from Google Sheets")
+    add_years(sync)
+    sync.set_defaults(func=cmd_sync)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except Exception as e:
+        print(f"❌ {args.command} failed: {type(e).__name__}: {e}", file=sys.stderr)
+        return 1
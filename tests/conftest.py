@@ -0,0 +1,44 @@
+"""Tests run against the offline backend (utils/local_backend.py): no network, no credentials.
+
+Settings and the cache directory are installed here, before any utils module reads them.
+"""
+import os
+import tempfile
+
+import pytest
+
+WORKDIR = tempfile.mkdtemp(prefix="opp-tests-")
+os.environ["OPP_CACHE_DIR"] = os.path.join(WORKDIR, "cache")
+
+from utils import cache, settings  # noqa: E402
+
+SHEET_ID = "test-sheet"
+YEARS = ["2025"]
+ROWS = 20
+
+settings.use_provider(settings.DictSettings({
+    "gsheet_id": SHEET_ID,
+    "gdrive_folder_id": "test-root",
+    "years": YEARS,
+    "income_tabs": [f"{year} OPP Income" for year in YEARS],
+    "expense_tabs": [f"{year} OPP Expenses" for year in YEARS],
+    "payment_statuses": ["Paid", "PMT due", "Downpayment received"],
+    "storage_backend": "local",
+    "local_backend_dir": os.path.join(WORKDIR, "backend"),
+}))
+cache.use_backend("memory")
+
+
+# --- A freshly seeded sheet, an empty mirror and empty caches for every test ---
+@pytest.fixture
+def backend():
+    from benchmarks.synthetic import seed_ledger
+    from utils import ledger_mirror
+    from utils.google_clients import get_local_backend
+
+    cache.clear_all()
+    ledger_mirror.clear()
+    backend = get_local_backend()
+    backend.reset()
+    seed_ledger(backend, SHEET_ID, YEARS, ROWS)
+    return backend
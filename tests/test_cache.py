@@ -0,0 +1,80 @@
+"""Per-entry invalidate/update on every cache backend, including the Streamlit peek/refill path."""
+import pandas as pd
+import pytest
+
+from utils import cache
+
+
+@pytest.fixture(params=["memory", "disk", "streamlit"])
+def cached_frame(request):
+    """A cached frame loader on the given backend, and the list of arguments it was computed for."""
+    calls = []
+
+    def load_frame(n: int) -> pd.DataFrame:
+        calls.append(n)
+        return pd.DataFrame({"n": range(n)})
+
+    cache.use_backend(request.param)
+    try:
+        loader = cache.cached(ttl=300)(load_frame)
+        loader.clear()
+        yield loader, calls
+    finally:
+        loader.clear()
+        cache.use_backend("memory")
+
+
+def append_row(df: pd.DataFrame) -> pd.DataFrame:
+    return pd.concat([df, pd.DataFrame({"n": [len(df)]})], ignore_index=True)
+
+
+def test_update_replaces_the_entry_without_recomputing(cached_frame):
+    loader, calls = cached_frame
+    assert len(loader(3)) == 3
+
+    assert loader.update(append_row, 3) is True
+    assert loader(3)["n"].tolist() == [0, 1, 2, 3]
+    assert calls == [3]
+
+
+def test_update_of_a_missing_entry_leaves_nothing_behind(cached_frame):
+    loader, calls = cached_frame
+    assert loader.update(append_row, 2) is False
+    assert calls == []
+
+    assert len(loader(2)) == 2  # computed normally, not from a half-finished update
+    assert calls == [2]
+
+
+def test_update_touches_only_its_own_entry(cached_frame):
+    loader, calls = cached_frame
+    loader(2)
+    loader(3)
+
+    loader.update(append_row, 2)
+    assert len(loader(2)) == 3
+    assert len(loader(3)) == 3
+    assert calls == [2, 3]
+
+
+def test_invalidate_drops_only_its_own_entry(cached_frame):
+    loader, calls = cached_frame
+    loader(2)
+    loader(3)
+
+    loader.invalidate(2)
+    loader(2)
+    loader(3)
+    assert calls == [2, 3, 2]
+
+
+def test_failed_update_keeps_the_old_entry(cached_frame):
+    loader, calls = cached_frame
+    loader(2)
+
+    def broken(df):
+        raise RuntimeError("cannot patch")
+
+    with pytest.raises(RuntimeError):
+        loader.update(broken, 2)
+    assert len(loader(2)) == 2  # kept, or dropped and recomputed; never half-patched
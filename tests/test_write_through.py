@@ -0,0 +1,137 @@
+"""Write-through, mirror sync and header checks against the offline backend."""
+import pytest
+
+from conftest import SHEET_ID
+from utils import ledger_mirror
+from utils.google_sheets import (
+    append_row_to_sheet, load_sheet_as_df, load_sheets_as_dfs, update_cells_in_sheet
+)
+from utils.local_backend import LocalSpreadsheet, LocalWorksheet
+
+TAB = "2025 OPP Income"
+
+
+def live_rows(backend, tab_name: str = TAB) -> tuple:
+    """(header, rows) of the tab as the backend holds it, padded like the mirror."""
+    _, header, rows = ledger_mirror.split_header(LocalWorksheet(backend, SHEET_ID, tab_name).get_all_values())
+    return header, rows
+
+
+def mirrored_rows(tab_name: str = TAB) -> tuple:
+    df = ledger_mirror.read_tab(SHEET_ID, tab_name)
+    return list(df.columns), df.values.tolist()
+
+
+def reload(tab_name: str = TAB):
+    """Drop the cached frames (not the mirror), as when their TTL runs out, and load again."""
+    load_sheet_as_df.clear()
+    load_sheets_as_dfs.clear()
+    return load_sheet_as_df(SHEET_ID, tab_name)
+
+
+def edit_outside(backend, change, tab_name: str = TAB) -> None:
+    """Rewrite the tab as someone editing in the Sheets UI would; change(values) -> values."""
+    values = LocalWorksheet(backend, SHEET_ID, tab_name).get_all_values()
+    backend.seed_tab(SHEET_ID, tab_name, change(values))
+
+
+def test_append_then_read(backend):
+    before = load_sheet_as_df(SHEET_ID, TAB)
+    append_row_to_sheet(SHEET_ID, TAB, {"Name": "New Renter", "Notes": "appended"})
+
+    calls = backend.calls
+    df = load_sheet_as_df(SHEET_ID, TAB)
+    assert backend.calls == calls  # served from the patched frame
+    assert len(df) == len(before) + 1
+    assert df.iloc[-1]["Name"] == "New Renter"
+
+    calls = backend.calls
+    df = reload()
+    assert backend.calls == calls + 1  # the version probe only: the mirror is current
+    assert mirrored_rows() == live_rows(backend)
+    assert df.iloc[-1]["Notes"] == "appended"
+
+
+def test_edit_then_read(backend):
+    load_sheet_as_df(SHEET_ID, TAB)
+    rows = update_cells_in_sheet(SHEET_ID, TAB, [(3, "Notes", "edited"), (3, "Status", "Paid")])
+    assert rows == {3}
+
+    calls = backend.calls
+    df = load_sheet_as_df(SHEET_ID, TAB)
+    assert backend.calls == calls
+    assert df.loc[3, "Notes"] == "edited"
+
+    calls = backend.calls
+    reload()
+    assert backend.calls == calls + 1
+    assert mirrored_rows() == live_rows(backend)
+
+
+def test_outside_edit_above_tail(backend, monkeypatch):
+    load_sheet_as_df(SHEET_ID, TAB)
+
+    def edit_row_3(values):
+        values[3][values[0].index("Name")] = "edited in Sheets"
+        return values
+
+    edit_outside(backend, edit_row_3)
+    # The tail probe can't see it until the tab's next full download is due
+    assert reload().loc[2, "Name"] != "edited in Sheets"
+
+    monkeypatch.setattr(ledger_mirror, "FULL_RESYNC_SECONDS", 0)
+    assert reload().loc[2, "Name"] == "edited in Sheets"
+    assert mirrored_rows() == live_rows(backend)
+
+
+def test_outside_delete_resyncs(backend):
+    load_sheet_as_df(SHEET_ID, TAB)
+    edit_outside(backend, lambda values: values[:1] + values[2:])
+
+    df = reload()
+    assert len(df) == len(live_rows(backend)[1])
+    assert mirrored_rows() == live_rows(backend)
+
+
+def test_outside_edit_to_other_tab_only_probes(backend, monkeypatch):
+    load_sheet_as_df(SHEET_ID, TAB)
+    edit_outside(backend, lambda values: values + [["x"]], "2025 OPP Expenses")
+
+    requested = []
+    batch_get = LocalSpreadsheet.values_batch_get
+
+    def spy(self, ranges, params=None):
+        requested.extend(ranges)
+        return batch_get(self, ranges, params)
+
+    monkeypatch.setattr(LocalSpreadsheet, "values_batch_get", spy)
+    reload()
+    assert requested and all("!" in r for r in requested)  # header + tail probe, no whole-tab range
+
+
+def test_header_change(backend):
+    load_sheet_as_df(SHEET_ID, TAB)
+    update_cells_in_sheet(SHEET_ID, TAB, [(0, "Notes", "first")])  # header map now cached
+
+    def insert_deposit(values):
+        at = values[0].index("Notes")
+        return [row[:at] + ["Deposit" if i == 0 else "100"] + row[at:] for i, row in enumerate(values)]
+
+    stale = load_sheet_as_df(SHEET_ID, TAB)
+    edit_outside(backend, insert_deposit)
+    df = reload()
+    assert "Deposit" in df.columns
+
+    # An edit made on a frame loaded before the change is refused, not misplaced
+    with pytest.raises(ValueError):
+        update_cells_in_sheet(SHEET_ID, TAB, [(1, "Notes", "stale")], columns=stale.columns)
+    df = reload()
+
+    update_cells_in_sheet(SHEET_ID, TAB, [(1, "Notes", "second")], columns=df.columns)
+    append_row_to_sheet(SHEET_ID, TAB, {"Name": "New Renter", "Notes": "appended", "Deposit": "5"})
+
+    header, rows = live_rows(backend)
+    deposit, notes = header.index("Deposit"), header.index("Notes")
+    assert (rows[1][deposit], rows[1][notes]) == ("100", "second")
+    assert (rows[-1][deposit], rows[-1][notes]) == ("5", "appended")
+    assert mirrored_rows() == (header, rows)
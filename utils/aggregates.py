@@ -0,0 +1,36 @@
+import pandas as pd
+
+from utils.cache import cached
+from utils.ledger import load_ledger
+from utils.tracing import traced
+
+# --- Cube dimensions and measures; the year is the cache key ---
+INCOME_KEYS = ["Property", "Month", "Income Source", "Status"]
+INCOME_MEASURES = ["Amount Received", "Amount Owed"]
+EXPENSE_KEYS = ["Property", "Month", "Category"]
+EXPENSE_MEASURES = ["Amount"]
+
+def rollup(df: pd.DataFrame, keys: list, measures: list) -> pd.DataFrame:
+    if df.empty:
+        return pd.DataFrame(columns=keys + measures)
+    keys = [k for k in keys if k in df.columns]
+    measures = [m for m in measures if m in df.columns]
+    if not keys:
+        return pd.DataFrame(columns=measures)
+    return df.groupby(keys, observed=True, dropna=False)[measures].sum().reset_index()
+
+# --- One small pre-aggregated table per tab, built when the ledger loads ---
+@cached(ttl=300)
+@traced()
+def load_cube(year: str) -> tuple:
+    df_income, df_expense = load_ledger(year)
+    return (
+        rollup(df_income, INCOME_KEYS, INCOME_MEASURES),
+        rollup(df_expense, EXPENSE_KEYS, EXPENSE_MEASURES),
+    )
+
+# --- Cube rows for one property ---
+def slice_property(cube: pd.DataFrame, property_name: str) -> pd.DataFrame:
+    if "Property" not in cube.columns:
+        return cube.iloc[0:0]
+    return cube[cube["Property"] == property_name]
@@ -0,0 +1,311 @@
+import copy
+import functools
+import hashlib
+import inspect
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from utils import tracing
+from utils.local_store import connect
+from utils.settings import get_settings
+
+# --- Backend per process: "auto" (Streamlit inside a script run, memory otherwise), "memory", "disk", "streamlit" ---
+BACKEND_SETTING = "cache_backend"
+
+_backend_override = None
+
+def use_backend(name: str | None) -> None:
+    """Force a backend for every cached function not yet called (None restores the setting)."""
+    global _backend_override
+    _backend_override = name
+
+def _streamlit_running() -> bool:
+    if "streamlit" not in sys.modules:
+        return False
+    from streamlit import runtime
+
+    return runtime.exists()
+
+def backend_name() -> str:
+    name = _backend_override or get_settings().get(BACKEND_SETTING, "auto")
+    if name == "auto":
+        return "streamlit" if _streamlit_running() else "memory"
+    return name
+
+# --- Cache keys: arguments named with a leading underscore are not hashed (as in st.cache_data) ---
+def _hash_value(digest, value) -> None:
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(type(value).__name__.encode())
+        if isinstance(value, pd.DataFrame):
+            digest.update("\x1f".join(map(str, value.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+    elif isinstance(value, (tuple, list)):
+        digest.update(b"(")
+        for item in value:
+            _hash_value(digest, item)
+        digest.update(b")")
+    else:
+        try:
+            digest.update(pickle.dumps(value, protocol=4))
+        except Exception:
+            digest.update(repr(value).encode())
+
+def make_key(func, args, kwargs, signature=None) -> str:
+    bound = (signature or inspect.signature(func)).bind(*args, **kwargs)
+    bound.apply_defaults()
+    digest = hashlib.sha1(f"{func.__module__}.{func.__qualname__}".encode())
+    for name, value in bound.arguments.items():
+        if name.startswith("_"):
+            continue
+        digest.update(name.encode())
+        _hash_value(digest, value)
+    return digest.hexdigest()
+
+# --- In-process LRU with optional TTL ---
+class MemoryBackend:
+    def __init__(self, ttl=None, max_entries=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value) -> None:
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while self.max_entries and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def replace(self, key, update) -> bool:
+        """Swap an unexpired entry for update(value), keeping its expiry; False if there is none."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[1] is not None and entry[1] < time.time()):
+                return False
+            self._entries[key] = (update(entry[0]), entry[1])
+            return True
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+# --- Pickled values in the local SQLite store; survives restarts and is shared across processes ---
+_DISK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    expires_at REAL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+"""
+
+class DiskBackend:
+    def __init__(self, namespace: str, ttl=None, max_entries=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def get(self, key):
+        now = time.time()
+        with connect() as conn:
+            conn.executescript(_DISK_SCHEMA)
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None:
+                return False, None
+            if row[1] is not None and row[1] < now:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+                return False, None
+            conn.execute(
+                "UPDATE cache_entries SET used_at = ? WHERE namespace = ? AND key = ?", (now, self.namespace, key)
+            )
+        return True, pickle.loads(row[0])
+
+    def set(self, key, value) -> None:
+        now = time.time()
+        with connect() as conn:
+            conn.executescript(_DISK_SCHEMA)
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                 now + self.ttl if self.ttl else None, now),
+            )
+            if self.max_entries:
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key NOT IN ("
+                    "SELECT key FROM cache_entries WHERE namespace = ? ORDER BY used_at DESC LIMIT ?)",
+                    (self.namespace, self.namespace, self.max_entries),
+                )
+
+    def replace(self, key, update) -> bool:
+        hit, value = self.get(key)
+        if not hit:
+            return False
+        with connect() as conn:
+            conn.execute(
+                "UPDATE cache_entries SET value = ? WHERE namespace = ? AND key = ?",
+                (pickle.dumps(update(value), protocol=pickle.HIGHEST_PROTOCOL), self.namespace, key),
+            )
+        return True
+
+    def delete(self, key) -> None:
+        with connect() as conn:
+            conn.executescript(_DISK_SCHEMA)
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    def clear(self) -> None:
+        with connect() as conn:
+            conn.executescript(_DISK_SCHEMA)
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+class _Miss(Exception):
+    """Raised inside a Streamlit-cached call to look up an entry without computing it."""
+
+# --- Decorated function; the backend is picked on first call, so importing stays Streamlit-free ---
+class CachedFunction:
+    def __init__(self, func, ttl, max_entries, resource, show_spinner):
+        self.func = func
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.resource = resource
+        self.show_spinner = show_spinner
+        self._backend = None
+        self._st_func = None
+        self._signature = inspect.signature(func)
+        self._lock = threading.Lock()
+        self._computed = threading.local()
+        self.name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+        functools.update_wrapper(self, func)
+
+    def _resolve(self):
+        with self._lock:
+            if self._backend is not None or self._st_func is not None:
+                return
+            name = backend_name()
+            if name == "streamlit":
+                import streamlit as st
+
+                decorator = st.cache_resource if self.resource else st.cache_data
+                self._st_func = decorator(
+                    ttl=self.ttl, max_entries=self.max_entries, show_spinner=self.show_spinner
+                )(self._miss_recorder())
+            elif name == "disk" and not self.resource:
+                self._backend = DiskBackend(f"{self.func.__module__}.{self.func.__qualname__}",
+                                            self.ttl, self.max_entries)
+            elif name in ("memory", "disk"):
+                # Resources (clients, pools) cannot be pickled; they always stay in memory
+                self._backend = MemoryBackend(self.ttl, self.max_entries)
+            else:
+                raise ValueError(f"Unknown cache backend: {name}")
+
+    def _miss_recorder(self):
+        # Streamlit only calls this on a miss; wraps keeps the name, signature and source it keys on
+        func, computed = self.func, self._computed
+
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            computed.flag = True
+            if getattr(computed, "peek", False):
+                raise _Miss()  # exceptions are not cached, so the lookup leaves no entry behind
+            if getattr(computed, "value", None) is not None:
+                return computed.value[0]
+            return func(*args, **kwargs)
+        return compute
+
+    def __call__(self, *args, **kwargs):
+        if self._backend is None and self._st_func is None:
+            self._resolve()
+        if self._st_func is not None:
+            self._computed.flag = False
+            value = self._st_func(*args, **kwargs)
+            tracing.cache_event(self.name, hit=not self._computed.flag)
+            return value
+
+        key = make_key(self.func, args, kwargs, self._signature)
+        hit, value = self._backend.get(key)
+        tracing.cache_event(self.name, hit)
+        if not hit:
+            value = self.func(*args, **kwargs)
+            self._backend.set(key, value)
+        # Data results are handed out as copies so callers can mutate them freely
+        return value if self.resource else copy.deepcopy(value)
+
+    def clear(self) -> None:
+        if self._st_func is not None:
+            self._st_func.clear()
+        elif self._backend is not None:
+            self._backend.clear()
+
+    # --- Per-entry write-through: only the entry for these arguments is touched ---
+    def invalidate(self, *args, **kwargs) -> None:
+        if self._backend is None and self._st_func is None:
+            self._resolve()
+        if self._st_func is not None:
+            self._st_func.clear(*args, **kwargs)
+        else:
+            self._backend.delete(make_key(self.func, args, kwargs, self._signature))
+
+    def update(self, update, *args, **kwargs) -> bool:
+        """Replace the cached value for these arguments with update(value); False if nothing was cached."""
+        if self._backend is None and self._st_func is None:
+            self._resolve()
+        if self._st_func is None:
+            return self._backend.replace(make_key(self.func, args, kwargs, self._signature), update)
+
+        # Streamlit has no way to write an entry directly: look it up without computing,
+        # then drop it and refill it through the decorated function with the new value
+        self._computed.peek = True
+        try:
+            value = self._st_func(*args, **kwargs)
+        except _Miss:
+            return False
+        finally:
+            self._computed.peek = False
+        self._st_func.clear(*args, **kwargs)
+        self._computed.value = (update(value),)
+        try:
+            self._st_func(*args, **kwargs)
+        finally:
+            self._computed.value = None
+        return True
+
+_registry = []
+
+def cached(ttl=None, max_entries=None, resource=False, show_spinner=False):
+    """Backend-neutral stand-in for st.cache_data (default) and st.cache_resource (resource=True)."""
+    def decorator(func):
+        wrapper = CachedFunction(func, ttl, max_entries, resource, show_spinner)
+        _registry.append(wrapper)
+        return wrapper
+    return decorator
+
+def clear_all() -> None:
+    for wrapper in _registry:
+        wrapper.clear()
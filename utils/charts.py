@@ -0,0 +1,106 @@
+import io
+import pandas as pd
+import streamlit as st
+
+from utils.cache import cached
+from utils.config import CHART_RENDERER
+from utils.tracing import traced
+
+# --- Rendered images kept per (chart, data) fingerprint; oldest evicted first ---
+MAX_CACHED_CHARTS = 64
+
+def _currency(x, _):
+    return f"${x:,.0f}"
+
+def _to_png(fig) -> bytes:
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", dpi=120)
+    return buf.getvalue()
+
+# --- Monthly income/expense bars with a profit line ---
+@cached(max_entries=MAX_CACHED_CHARTS)
+@traced()
+def _render_monthly_png(monthly: pd.DataFrame, title: str) -> bytes:
+    from matplotlib.figure import Figure
+
+    # Figure objects are not registered with pyplot, so nothing lingers after rendering
+    fig = Figure()
+    ax = fig.subplots()
+    ax.bar(monthly.index, monthly["Income"], label="Income", alpha=0.6)
+    ax.bar(monthly.index, monthly["Expenses"], label="Expenses", alpha=0.6)
+    ax.plot(monthly.index, monthly["Profit"], color="green", marker="o", label="Profit")
+    ax.set_ylabel("Amount ($)")
+    ax.set_title(title)
+    ax.legend()
+    ax.tick_params(axis="x", labelrotation=45)
+    return _to_png(fig)
+
+# --- Single-series bar chart (vertical or horizontal) ---
+@cached(max_entries=MAX_CACHED_CHARTS)
+@traced()
+def _render_bar_png(series: pd.Series, title: str, color: str, horizontal: bool) -> bytes:
+    import matplotlib.ticker as ticker
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    ax = fig.subplots()
+    if horizontal:
+        ax.barh(series.index.astype(str), series.values, color=color)
+        ax.xaxis.set_major_formatter(ticker.FuncFormatter(_currency))
+        ax.set_xlabel("Total ($)")
+    else:
+        ax.bar(series.index.astype(str), series.values, color=color)
+        ax.set_ylabel("Amount ($)")
+        ax.tick_params(axis="x", labelrotation=90)
+    ax.set_title(title)
+    return _to_png(fig)
+
+# --- Vega-Lite specs, rendered in the browser ---
+def _monthly_spec(title: str) -> dict:
+    x = {"field": "Month", "type": "ordinal", "sort": None}
+    return {
+        "title": title,
+        "layer": [
+            {
+                "mark": {"type": "bar", "opacity": 0.6},
+                "transform": [{"fold": ["Income", "Expenses"], "as": ["Series", "Value"]}],
+                "encoding": {
+                    "x": x,
+                    "y": {"field": "Value", "type": "quantitative", "title": "Amount ($)", "stack": None},
+                    "color": {"field": "Series", "type": "nominal"},
+                },
+            },
+            {
+                "mark": {"type": "line", "point": True, "color": "green"},
+                "encoding": {"x": x, "y": {"field": "Profit", "type": "quantitative"}},
+            },
+        ],
+    }
+
+def _bar_spec(title: str, label: str, color: str, horizontal: bool) -> dict:
+    category = {"field": label, "type": "nominal", "sort": "-x" if horizontal else "-y"}
+    value = {"field": "Total", "type": "quantitative", "title": "Total ($)", "axis": {"format": "$,.0f"}}
+    return {
+        "title": title,
+        "mark": {"type": "bar", "color": color},
+        "encoding": {"y": category, "x": value} if horizontal else {"x": category, "y": value},
+    }
+
+# --- Public helpers used by the pages ---
+@traced()
+def show_monthly_chart(monthly: pd.DataFrame, title: str):
+    if CHART_RENDERER == "vega":
+        data = monthly.rename_axis("Month").reset_index()
+        st.vega_lite_chart(data, _monthly_spec(title), use_container_width=True)
+    else:
+        st.image(_render_monthly_png(monthly, title))
+
+@traced()
+def show_bar_chart(series: pd.Series, title: str, color: str, horizontal: bool = False):
+    if CHART_RENDERER == "vega":
+        label = series.index.name or "Label"
+        data = series.rename("Total").rename_axis(label).reset_index()
+        data[label] = data[label].astype(str)
+        st.vega_lite_chart(data, _bar_spec(title, label, color, horizontal), use_container_width=True)
+    else:
+        st.image(_render_bar_png(series, title, color, horizontal))
@@ -1,14 +1,21 @@
-import streamlit as st
 from datetime import date, datetime
 
+from utils.settings import get_settings
+
+# --- Settings come from utils.settings (secrets file, st.secrets, OPP_* env vars) ---
+SETTINGS = get_settings()
+
 # --- Secrets-based values ---
-SHEET_ID = st.secrets["gsheet_id"]
-DRIVE_FOLDER_ID = st.secrets["gdrive_folder_id"]
-YEARS = st.secrets["years"]
-INCOME_TABS = st.secrets["income_tabs"]
-EXPENSE_TABS = st.secrets["expense_tabs"]
-STATUS_OPTIONS = st.secrets["payment_statuses"]
-MONTHLY_FOLDERS = st.secrets.get("monthly_folders", {})
+SHEET_ID = SETTINGS["gsheet_id"]
+DRIVE_FOLDER_ID = SETTINGS["gdrive_folder_id"]
+YEARS = SETTINGS["years"]
+INCOME_TABS = SETTINGS["income_tabs"]
+EXPENSE_TABS = SETTINGS["expense_tabs"]
+STATUS_OPTIONS = SETTINGS["payment_statuses"]
+MONTHLY_FOLDERS = SETTINGS.get("monthly_folders", {})
+CHART_RENDERER = SETTINGS.get("chart_renderer", "png")  # "png" (cached images) or "vega" (browser)
+DRIVE_UPLOAD_CHUNK_MB = SETTINGS.get("drive_upload_chunk_mb", 5)
+COMPRESS_RECEIPTS = SETTINGS.get("compress_receipts", True)
 
 # --- Defaults ---
 CURRENT_YEAR = str(datetime.now().year)
@@ -1,24 +1,13 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import streamlit as st
-from utils.google_sheets import load_sheet_as_df
-from utils.config import SHEET_ID
+from utils.aggregates import load_cube, slice_property
+from utils.ledger import MONTHS
+from utils.tracing import traced
 
+# --- Pre-aggregated income/expense rows for one property (same column names as the ledger) ---
+@traced()
 def load_dashboard_data(year: str, property_name: str):
-    df_income = load_sheet_as_df(SHEET_ID, f"{year} OPP Income")
-    df_expense = load_sheet_as_df(SHEET_ID, f"{year} OPP Expenses")
-
-    df_income = df_income[df_income["Property"].str.strip() == property_name]
-    df_expense = df_expense[df_expense["Property"].str.strip() == property_name]
-
-    df_income["Amount Received"] = pd.to_numeric(df_income["Amount Received"], errors="coerce").fillna(0)
-    df_income["Amount Owed"] = pd.to_numeric(df_income["Amount Owed"], errors="coerce").fillna(0)
-    df_income["Month"] = df_income["Month"].astype(str).str.strip()
-
-    df_expense["Amount"] = pd.to_numeric(df_expense["Amount"], errors="coerce").fillna(0)
-    df_expense["Month"] = df_expense["Month"].astype(str).str.strip()
-
-    return df_income, df_expense
+    income_cube, expense_cube = load_cube(year)
+    return slice_property(income_cube, property_name), slice_property(expense_cube, property_name)
 
 def calculate_summary_metrics(df_income, df_expense):
     total_received = df_income["Amount Received"].sum()
@@ -27,41 +16,31 @@ def calculate_summary_metrics(df_income, df_expense):
     net_profit = total_received - total_expenses
     return total_received, total_due, total_expenses, net_profit
 
+# --- Chart helpers pull in Streamlit; imported on use so the metrics above stay UI-free (CLI) ---
 def plot_monthly_financials(df_income, df_expense):
-    income_by_month = df_income.groupby("Month")["Amount Received"].sum()
-    expense_by_month = df_expense.groupby("Month")["Amount"].sum()
-
-    months_order = [
-        "January", "February", "March", "April", "May", "June",
-        "July", "August", "September", "October", "November", "December"
-    ]
+    from utils.charts import show_monthly_chart
 
-    income_by_month = income_by_month.reindex(months_order, fill_value=0)
-    expense_by_month = expense_by_month.reindex(months_order, fill_value=0)
-    profit_line = income_by_month - expense_by_month
+    income_by_month = df_income.groupby("Month", observed=True)["Amount Received"].sum()
+    expense_by_month = df_expense.groupby("Month", observed=True)["Amount"].sum()
 
-    fig, ax = plt.subplots()
-    ax.bar(income_by_month.index, income_by_month.values, label="Income", alpha=0.6)
-    ax.bar(expense_by_month.index, expense_by_month.values, label="Expenses", alpha=0.6)
-    ax.plot(profit_line.index, profit_line.values, color="green", marker="o", label="Profit")
+    monthly = pd.DataFrame({
+        "Income": income_by_month.reindex(MONTHS, fill_value=0),
+        "Expenses": expense_by_month.reindex(MONTHS, fill_value=0),
+    })
+    monthly["Profit"] = monthly["Income"] - monthly["Expenses"]
 
-    ax.set_ylabel("Amount ($)")
-    ax.set_title("Monthly Income vs Expenses")
-    ax.legend()
-    plt.xticks(rotation=45)
-    st.pyplot(fig)
+    show_monthly_chart(monthly, "Monthly Income vs Expenses")
 
 def plot_outstanding_chart(df_income):
+    import streamlit as st
+    from utils.charts import show_bar_chart
+
     df = df_income.copy()
     df["Outstanding"] = df["Amount Owed"] - df["Amount Received"]
-    by_status = df.groupby("Status")["Outstanding"].sum().sort_values(ascending=False)
+    by_status = df.groupby("Status", observed=True)["Outstanding"].sum().sort_values(ascending=False)
 
     if by_status.empty or by_status.sum() == 0:
         st.info("No outstanding balances.")
         return
 
-    fig, ax = plt.subplots()
-    by_status.plot(kind="bar", color="orange", ax=ax)
-    ax.set_ylabel("Amount ($)")
-    ax.set_title("What Is Still Owed (by Status)")
-    st.pyplot(fig)
+    show_bar_chart(by_status, "What Is Still Owed (by Status)", color="orange")
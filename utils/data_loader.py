@@ -1,13 +1,20 @@
 import pandas as pd
-import streamlit as st
 
-@st.cache_data(ttl=600, show_spinner=False)
+from utils.cache import cached
+from utils.ledger import apply_schema, parse_amounts
+
+EXCEL_SCHEMA = {
+    "Month": "month",
+    "Property": "category",
+    "Category": "category",
+    "Income Source": "category",
+}
+
+@cached(ttl=600)
 def load_excel_data(sheet, path="data/LLC Income and Expense Tracker.xlsx"):
     df = pd.read_excel(path, sheet_name=sheet)
-    if "Income Amount" in df.columns:
-        df["Income Amount"] = pd.to_numeric(df["Income Amount"], errors="coerce")
-        df = df.dropna(subset=["Income Amount"])
-    if "Amount" in df.columns:
-        df["Amount"] = pd.to_numeric(df["Amount"], errors="coerce")
-        df = df.dropna(subset=["Amount"])
-    return df
+    for col in ("Income Amount", "Amount"):
+        if col in df.columns:
+            df[col] = parse_amounts(df[col])
+            df = df.dropna(subset=[col])
+    return apply_schema(df, EXCEL_SCHEMA)
@@ -1,135 +1,430 @@
 import pandas as pd
+import hashlib
 import io
+import json
+import os
+import tempfile
 import zipfile
 
-from utils.google_sheets import load_sheet_as_df
-from utils.config import SHEET_ID
+from utils.cache import cached
+from utils.ledger import load_ledger, load_ledgers, parse_amounts, INCOME_SCHEMA, EXPENSE_SCHEMA
+from utils.local_store import CACHE_DIR
+from utils.tracing import traced
 
 
 def load_and_process_data(year: str):
-    income_tab = f"{year} OPP Income"
-    expense_tab = f"{year} OPP Expenses"
+    return load_ledger(year)
 
-    income_df = load_sheet_as_df(SHEET_ID, income_tab)
-    expense_df = load_sheet_as_df(SHEET_ID, expense_tab)
 
-    income_df = clean_amount_column(income_df, "Amount Received")
-    expense_df = clean_amount_column(expense_df, "Amount")
+def load_all_years(years) -> dict:
+    return load_ledgers(tuple(years))
 
-    return income_df, expense_df
+
+def load_available_years(years) -> tuple:
+    """(ledgers, missing years): a year whose tabs can't be loaded is left out instead of failing the rest."""
+    try:
+        return load_ledgers(tuple(years)), []
+    except Exception:
+        pass  # one batched fetch fails as a whole; retry year by year to find the culprit
+    ledgers, missing = {}, []
+    for year in years:
+        try:
+            ledgers[year] = load_ledger(year)
+        except Exception:
+            missing.append(year)
+    return ledgers, missing
 
 
 def clean_amount_column(df: pd.DataFrame, col: str) -> pd.DataFrame:
-    df[col] = pd.to_numeric(
-        df[col].astype(str).str.replace(r"[\$,]", "", regex=True),
-        errors="coerce"
-    ).fillna(0)
+    df[col] = parse_amounts(df[col]).fillna(0)
     return df
 
 
-def generate_summary(income_df: pd.DataFrame, expense_df: pd.DataFrame) -> pd.DataFrame:
-    total_income = income_df["Amount Received"].sum() if not income_df.empty else 0
-    total_expense = expense_df["Amount"].sum() if not expense_df.empty else 0
+# --- Export model: every summary table computed once, shared by all output formats ---
+def _group_totals(df: pd.DataFrame, key: str, amount: str):
+    """Per-key sums (largest first) and their grand total, from one groupby."""
+    if df.empty or amount not in df.columns:
+        return None, 0.0
+    if key not in df.columns:
+        return None, float(df[amount].sum())
+    grouped = (
+        df.groupby(key, observed=True, dropna=False)[amount]
+        .sum()
+        .reset_index()
+    )
+    grouped[key] = grouped[key].astype(object).where(grouped[key].notna(), "(none)").astype(str)
+    grouped = grouped.sort_values(by=amount, ascending=False, ignore_index=True)
+    return grouped, float(grouped[amount].sum())
+
+
+@traced()
+def build_export_model(income_df: pd.DataFrame, expense_df: pd.DataFrame) -> dict:
+    income_by_source, total_income = _group_totals(income_df, "Income Source", "Amount Received")
+    expense_by_category, total_expense = _group_totals(expense_df, "Category", "Amount")
     profit = total_income - total_expense
 
-    return pd.DataFrame({
-        "Category": ["Total Income", "Total Expenses", "Profit"],
-        "Amount": [total_income, total_expense, profit]
-    })
+    return {
+        "income": income_df,
+        "expense": expense_df,
+        "summary": pd.DataFrame({
+            "Category": ["Total Income", "Total Expenses", "Profit"],
+            "Amount": [total_income, total_expense, profit]
+        }),
+        "income_by_source": income_by_source,
+        "expense_by_category": expense_by_category,
+        "totals": {"income": total_income, "expense": total_expense, "profit": profit},
+    }
+
+
+def generate_summary(income_df: pd.DataFrame, expense_df: pd.DataFrame) -> pd.DataFrame:
+    return build_export_model(income_df, expense_df)["summary"]
+
+
+def _with_total_row(df: pd.DataFrame, total: float) -> pd.DataFrame:
+    key, amount = df.columns
+    return pd.concat([df, pd.DataFrame({key: ["Total"], amount: [total]})], ignore_index=True)
+
+
+# --- Column widths come from a bounded sample, not a full string pass ---
+WIDTH_SAMPLE_ROWS = 1000
+MAX_COL_WIDTH = 60
+
+
+def _estimate_widths(df: pd.DataFrame) -> list:
+    if len(df) > WIDTH_SAMPLE_ROWS:
+        half = WIDTH_SAMPLE_ROWS // 2
+        sample = pd.concat([df.head(half), df.tail(half)])
+    else:
+        sample = df
+    widths = []
+    for i, col in enumerate(df.columns):
+        values = sample.iloc[:, i]
+        longest = values.astype(str).str.len().max() if len(values) else 0
+        widths.append(min(max(len(str(col)), int(longest or 0)) + 2, MAX_COL_WIDTH))
+    return widths
+
+
+def _cell_writer(ws, series: pd.Series, fmt, date_fmt):
+    """Pick a per-column write function so the row loop does no type dispatch."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        def write(row, col, value):
+            if not pd.isna(value):
+                ws.write_datetime(row, col, value.to_pydatetime(), date_fmt)
+    elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        def write(row, col, value):
+            if value == value:  # skip NaN
+                ws.write_number(row, col, value, fmt)
+    else:
+        def write(row, col, value):
+            if not pd.isna(value):
+                ws.write_string(row, col, str(value))
+    return write
+
+
+def _write_sheet(workbook, formats: dict, df: pd.DataFrame, sheet: str, currency_cols=None, total=None):
+    """Write a frame row by row (constant_memory requires strict row order)."""
+    if df.empty:
+        return
+    currency_cols = currency_cols or []
+    ws = workbook.add_worksheet(sheet)
+
+    for i, (col, width) in enumerate(zip(df.columns, _estimate_widths(df))):
+        ws.set_column(i, i, width, formats["currency"] if col in currency_cols else None)
+        ws.write_string(0, i, str(col), formats["bold"])
+
+    writers = [
+        _cell_writer(ws, df.iloc[:, i], formats["currency"] if col in currency_cols else None, formats["date"])
+        for i, col in enumerate(df.columns)
+    ]
+    row_num = 0
+    for row_num, row in enumerate(df.itertuples(index=False, name=None), start=1):
+        for col_num, value in enumerate(row):
+            writers[col_num](row_num, col_num, value)
+
+    if total is not None:
+        total_row = row_num + 1
+        for i, col in enumerate(df.columns):
+            if col in currency_cols:
+                ws.write_number(total_row, i, total, formats["total"])
+            else:
+                ws.write_string(total_row, i, "Total", formats["bold"])
 
 
-def generate_excel_export(income_df, expense_df, summary_df=None):
+def generate_excel_export(model: dict, include_summary: bool = True):
+    import xlsxwriter
+
+    totals = model["totals"]
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        workbook = writer.book
-        bold = workbook.add_format({"bold": True})
-        currency = workbook.add_format({"num_format": "$#,##0.00"})
-        total = workbook.add_format({"bold": True, "num_format": "$#,##0.00"})
-
-        def write_df(df, sheet, currency_cols=None, add_total=False):
-            if df.empty:
-                return
-            df_out = df.copy()
-
-            # Append totals row if requested
-            if add_total and currency_cols:
-                totals = {
-                    col: df_out[col].sum() if col in currency_cols else "Total"
-                    for col in df_out.columns
-                }
-                df_out.loc[len(df_out)] = totals
-
-            df_out.to_excel(writer, sheet_name=sheet, index=False)
-            ws = writer.sheets[sheet]
-
-            for i, col in enumerate(df_out.columns):
-                col_width = max(len(str(col)), *(df_out[col].astype(str).str.len())) + 2
-                fmt = currency if currency_cols and col in currency_cols else None
-                ws.set_column(i, i, col_width, fmt)
-                ws.write(0, i, col, bold)
-
-        write_df(income_df, "Income", currency_cols=["Amount Received"])
-        write_df(expense_df, "Expenses", currency_cols=["Amount"])
-        if summary_df is not None:
-            write_df(summary_df, "Summary", currency_cols=["Amount"])
-
-        if "Income Source" in income_df.columns:
-            income_summary = (
-                income_df.groupby("Income Source")["Amount Received"]
-                .sum()
-                .reset_index()
-                .sort_values(by="Amount Received", ascending=False)
-            )
-            write_df(income_summary, "Income by Source", currency_cols=["Amount Received"], add_total=True)
-
-        if "Category" in expense_df.columns:
-            expense_summary = (
-                expense_df.groupby("Category")["Amount"]
-                .sum()
-                .reset_index()
-                .sort_values(by="Amount", ascending=False)
-            )
-            write_df(expense_summary, "Expenses by Category", currency_cols=["Amount"], add_total=True)
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    try:
+        formats = {
+            "bold": workbook.add_format({"bold": True}),
+            "currency": workbook.add_format({"num_format": "$#,##0.00"}),
+            "total": workbook.add_format({"bold": True, "num_format": "$#,##0.00"}),
+            "date": workbook.add_format({"num_format": "yyyy-mm-dd"}),
+        }
+
+        def write_df(df, sheet, currency_cols=None, total=None):
+            _write_sheet(workbook, formats, df, sheet, currency_cols, total)
+
+        write_df(model["income"], "Income", currency_cols=["Amount Received"])
+        write_df(model["expense"], "Expenses", currency_cols=["Amount"])
+        if include_summary:
+            write_df(model["summary"], "Summary", currency_cols=["Amount"])
+        if model["income_by_source"] is not None:
+            write_df(model["income_by_source"], "Income by Source",
+                     currency_cols=["Amount Received"], total=totals["income"])
+        if model["expense_by_category"] is not None:
+            write_df(model["expense_by_category"], "Expenses by Category",
+                     currency_cols=["Amount"], total=totals["expense"])
+    finally:
+        workbook.close()
 
     output.seek(0)
     return output
 
 
-def generate_zip_export(income_df, expense_df, summary_df, year):
+def generate_csv_files(model: dict, prefix) -> list:
+    """(file name, CSV text) pairs for the income, expense and summary tables."""
+    totals = model["totals"]
+    files = []
+    if not model["income"].empty:
+        files.append((f"{prefix}_Income.csv", model["income"].to_csv(index=False)))
+    if not model["expense"].empty:
+        files.append((f"{prefix}_Expenses.csv", model["expense"].to_csv(index=False)))
+    files.append((f"{prefix}_Summary.csv", model["summary"].to_csv(index=False)))
+
+    if model["income_by_source"] is not None:
+        table = _with_total_row(model["income_by_source"], totals["income"])
+        files.append((f"{prefix}_Income_by_Source.csv", table.to_csv(index=False)))
+    if model["expense_by_category"] is not None:
+        table = _with_total_row(model["expense_by_category"], totals["expense"])
+        files.append((f"{prefix}_Expenses_by_Category.csv", table.to_csv(index=False)))
+
+    return files
+
+
+def generate_zip_export(model: dict, year):
     buffer = io.BytesIO()
     with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        if not income_df.empty:
-            zip_file.writestr(f"{year}_Income.csv", income_df.to_csv(index=False))
-        if not expense_df.empty:
-            zip_file.writestr(f"{year}_Expenses.csv", expense_df.to_csv(index=False))
-        if summary_df is not None:
-            zip_file.writestr(f"{year}_Summary.csv", summary_df.to_csv(index=False))
-
-        if "Income Source" in income_df.columns:
-            income_summary = (
-                income_df.groupby("Income Source")["Amount Received"]
-                .sum()
-                .reset_index()
-                .sort_values(by="Amount Received", ascending=False)
-            )
-            income_summary.loc[len(income_summary)] = [
-                "Total",
-                income_summary["Amount Received"].sum()
-            ]
-            zip_file.writestr(f"{year}_Income_by_Source.csv", income_summary.to_csv(index=False))
-
-        if "Category" in expense_df.columns:
-            expense_summary = (
-                expense_df.groupby("Category")["Amount"]
-                .sum()
-                .reset_index()
-                .sort_values(by="Amount", ascending=False)
-            )
-            expense_summary.loc[len(expense_summary)] = [
-                "Total",
-                expense_summary["Amount"].sum()
-            ]
-            zip_file.writestr(f"{year}_Expenses_by_Category.csv", expense_summary.to_csv(index=False))
+        for name, text in generate_csv_files(model, year):
+            zip_file.writestr(name, text)
+
+    buffer.seek(0)
+    return buffer
+
+
+# --- Typed outputs for scripts: Parquet tables and newline-delimited JSON ---
+AMOUNT_COLUMNS = {
+    col for schema in (INCOME_SCHEMA, EXPENSE_SCHEMA) for col, kind in schema.items() if kind == "amount"
+}
+AMOUNT_PRECISION = (12, 2)  # decimal128: up to $9,999,999,999.99
+
+TYPED_TABLES = {
+    "income": "Income",
+    "expense": "Expenses",
+    "summary": "Summary",
+    "income_by_source": "Income_by_Source",
+    "expense_by_category": "Expenses_by_Category",
+}
+
+
+def _arrow_table(df: pd.DataFrame):
+    """Arrow table with categoricals kept as dictionaries and amounts as exact decimals."""
+    import pyarrow as pa
+
+    precision, scale = AMOUNT_PRECISION
+    columns = {}
+    for col in df.columns:
+        s = df[col]
+        if col in AMOUNT_COLUMNS:
+            columns[str(col)] = pa.array(s.astype(float).round(scale)).cast(pa.decimal128(precision, scale))
+        elif s.dtype == object:
+            columns[str(col)] = pa.array(s.astype("string"), type=pa.string())
+        else:
+            # Categoricals (Property, Month, ...) arrive as dictionary arrays
+            columns[str(col)] = pa.array(s)
+    return pa.table(columns)
+
+
+def generate_parquet_export(model: dict, prefix):
+    """ZIP of one Parquet file per model table; Parquet already compresses, so entries are stored."""
+    import pyarrow.parquet as pq
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zip_file:
+        for key, name in TYPED_TABLES.items():
+            df = model[key]
+            if df is None or df.empty:
+                continue
+            part = io.BytesIO()
+            pq.write_table(_arrow_table(df), part, compression="zstd")
+            zip_file.writestr(f"{prefix}_{name}.parquet", part.getvalue())
+
+    buffer.seek(0)
+    return buffer
+
+
+def _json_value(value):
+    if pd.isna(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.date().isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def generate_ndjson_export(model: dict):
+    """One JSON record per line; each record names its table so a reader can split the stream."""
+    buffer = io.BytesIO()
+    for key in TYPED_TABLES:
+        df = model[key]
+        if df is None or df.empty:
+            continue
+        columns = [str(col) for col in df.columns]
+        df = df.round({col: AMOUNT_PRECISION[1] for col in columns if col in AMOUNT_COLUMNS})
+        for row in df.itertuples(index=False, name=None):
+            record = {"table": key}
+            record.update((col, _json_value(value)) for col, value in zip(columns, row))
+            buffer.write(json.dumps(record).encode())
+            buffer.write(b"\n")
 
     buffer.seek(0)
     return buffer
+
+
+# --- Bulk export: every year x property, rendered in worker processes ---
+BULK_MAX_WORKERS = min(4, os.cpu_count() or 1)
+ALL_PROPERTIES = "All Properties"
+
+
+def _property_names(income_df, expense_df) -> list:
+    names = set()
+    for df in (income_df, expense_df):
+        if "Property" in df.columns:
+            names |= {str(p) for p in df["Property"].dropna().unique() if str(p)}
+    return sorted(names)
+
+
+def _bulk_tasks(ledgers: dict):
+    """Yield (year, property, income, expense) slices; nothing is rendered here."""
+    for year, (income_df, expense_df) in ledgers.items():
+        yield year, ALL_PROPERTIES, income_df, expense_df
+        for name in _property_names(income_df, expense_df):
+            yield (
+                year,
+                name,
+                income_df[income_df["Property"] == name] if "Property" in income_df.columns else income_df.iloc[0:0],
+                expense_df[expense_df["Property"] == name] if "Property" in expense_df.columns else expense_df.iloc[0:0],
+            )
+
+
+def _render_bulk_part(year, property_name, income_df, expense_df) -> list:
+    """Worker: one workbook plus its CSVs, as (archive path, bytes) pairs."""
+    label = property_name.replace(" ", "_")
+    folder = f"{year}/{label}"
+    prefix = f"{year}_{label}"
+    model = build_export_model(income_df, expense_df)
+
+    parts = [(f"{folder}/{prefix}_financial_export.xlsx", generate_excel_export(model).getvalue())]
+    parts += [(f"{folder}/{name}", text.encode()) for name, text in generate_csv_files(model, prefix)]
+    return parts
+
+
+@traced()
+def generate_bulk_export(ledgers: dict, output, max_workers: int = BULK_MAX_WORKERS) -> None:
+    """Stream every year/property bundle into one ZIP written to `output` (path or binary file)."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+    tasks = _bulk_tasks(ledgers)
+    # spawn: forking a threaded Streamlit server is not safe
+    context = multiprocessing.get_context("spawn")
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zip_file, \
+            ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+        pending = set()
+        for task in tasks:
+            pending.add(pool.submit(_render_bulk_part, *task))
+            # Bound the work in flight so finished parts are written out and dropped
+            if len(pending) >= max_workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for name, data in future.result():
+                        zip_file.writestr(name, data)
+        for future in pending:
+            for name, data in future.result():
+                zip_file.writestr(name, data)
+
+
+# --- Content hash of the ledger frames; changes whenever any cell does ---
+def ledger_fingerprint(*frames: pd.DataFrame) -> str:
+    digest = hashlib.sha1()
+    for df in frames:
+        digest.update("\x1f".join(map(str, df.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+EXPORT_FORMATS = {
+    "xlsx": ("financial_export.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "zip": ("financial_export.zip", "application/zip"),
+    "parquet": ("financial_export_parquet.zip", "application/zip"),
+    "ndjson": ("financial_export.ndjson", "application/x-ndjson"),
+    "bulk": ("all_years_export.zip", "application/zip"),
+}
+
+
+@traced()
+def render_export(model: dict, fmt: str, year) -> bytes:
+    if fmt == "xlsx":
+        return generate_excel_export(model).getvalue()
+    if fmt == "zip":
+        return generate_zip_export(model, year).getvalue()
+    if fmt == "parquet":
+        return generate_parquet_export(model, year).getvalue()
+    if fmt == "ndjson":
+        return generate_ndjson_export(model).getvalue()
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+# --- Finished export bytes, keyed by (year, fingerprint, format); frames are not hashed ---
+@cached(max_entries=16, show_spinner="Building export...")
+def build_export_artifact(year: str, fingerprint: str, fmt: str, _income_df, _expense_df) -> bytes:
+    return render_export(build_export_model(_income_df, _expense_df), fmt, year)
+
+
+# --- Bulk bundle on disk, one file per (years, fingerprint); only the newest few are kept ---
+BULK_DIR = os.path.join(CACHE_DIR, "exports")
+BULK_KEEP = 2
+
+
+def _prune_bulk_artifacts(keep: int = BULK_KEEP) -> None:
+    paths = [os.path.join(BULK_DIR, name) for name in os.listdir(BULK_DIR) if name.endswith(".zip")]
+    for path in sorted(paths, key=os.path.getmtime, reverse=True)[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # still being served, or already gone
+
+
+@traced()
+def build_bulk_artifact(fingerprint: str, ledgers: dict) -> str:
+    """Path of the bulk ZIP for these ledgers, built on first request and reused while they are unchanged."""
+    key = hashlib.sha1(json.dumps([list(ledgers), fingerprint]).encode()).hexdigest()
+    path = os.path.join(BULK_DIR, f"all_years_{key}.zip")
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+
+    os.makedirs(BULK_DIR, exist_ok=True)
+    fd, part = tempfile.mkstemp(dir=BULK_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            generate_bulk_export(ledgers, f)
+        os.replace(part, path)
+    except BaseException:
+        os.remove(part)
+        raise
+    _prune_bulk_artifacts()
+    return path
@@ -0,0 +1,119 @@
+import json
+from urllib.parse import urlsplit
+
+from utils import tracing
+from utils.cache import cached
+from utils.settings import get_settings
+
+# --- One credential with every scope the app uses ---
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+    "https://www.googleapis.com/auth/documents",
+]
+
+HTTP_TIMEOUT = 60
+POOL_SIZE = 16
+
+# --- Service-account credentials, parsed once per process ---
+@cached(resource=True)
+def get_credentials():
+    from google.oauth2 import service_account
+
+    creds_raw = get_settings()["gdrive_credentials"]
+    creds_dict = json.loads(creds_raw) if isinstance(creds_raw, str) else dict(creds_raw)
+    return service_account.Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
+
+# --- Pooled, auto-refreshing HTTP session shared by Sheets, Drive and Docs ---
+@cached(resource=True)
+def get_authorized_session():
+    from requests.adapters import HTTPAdapter
+    from google.auth.transport.requests import AuthorizedSession
+
+    session = AuthorizedSession(get_credentials())
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    session.mount("https://", adapter)
+    session.hooks["response"].append(_record_response)
+    return session
+
+# --- Every round trip on the shared session is counted (calls and bytes) in the current trace ---
+def _service_for(url: str) -> str:
+    parts = urlsplit(url)
+    if parts.netloc.startswith("sheets."):
+        return "sheets"
+    if parts.netloc.startswith("docs."):
+        return "docs"
+    if "/drive/" in parts.path:
+        return "drive"
+    return parts.netloc.split(".")[0]
+
+def _record_response(response, *args, **kwargs):
+    body = response.request.body
+    tracing.record_api_call(
+        _service_for(response.url),
+        bytes_sent=len(body) if isinstance(body, (bytes, str)) else 0,
+        bytes_received=len(response.content),
+    )
+
+class _SessionHttp:
+    """httplib2-style facade over the shared requests session, so googleapiclient reuses its pool."""
+
+    def __init__(self, session):
+        self.session = session
+        self.timeout = HTTP_TIMEOUT
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        import httplib2
+
+        response = self.session.request(method, uri, data=body, headers=headers, timeout=self.timeout)
+        info = {k: v for k, v in response.headers.items() if k.lower() != "content-encoding"}
+        info["status"] = response.status_code
+        return httplib2.Response(info), response.content
+
+# --- Static discovery documents shipped with google-api-python-client ---
+@cached(resource=True)
+def _discovery_document(name: str, version: str) -> str:
+    from googleapiclient.discovery_cache import get_static_doc
+
+    doc = get_static_doc(name, version)
+    if doc is None:
+        raise ValueError(f"No static discovery document for {name} {version}.")
+    return doc
+
+# --- Storage backend: "google" (live APIs) or "local" (offline stand-ins, see utils/local_backend.py) ---
+def storage_backend() -> str:
+    return get_settings().get("storage_backend", "google")
+
+@cached(resource=True)
+def get_local_backend():
+    from utils.local_backend import LocalBackend, DEFAULT_ROOT
+
+    settings = get_settings()
+    return LocalBackend(
+        root=settings.get("local_backend_dir", DEFAULT_ROOT),
+        latency_ms=settings.get("local_latency_ms", 0),
+        error_rate=settings.get("local_error_rate", 0.0),
+        seed=settings.get("local_seed"),
+    )
+
+# --- Built API clients, cached per process and bound to the shared session ---
+@cached(resource=True)
+def get_service(name: str, version: str):
+    from googleapiclient.discovery import build_from_document
+
+    if storage_backend() == "local":
+        from utils.local_backend import LocalDocsService, LocalDriveService
+
+        local_services = {"drive": LocalDriveService, "docs": LocalDocsService}
+        return local_services[name](get_local_backend())
+
+    return build_from_document(
+        _discovery_document(name, version),
+        http=_SessionHttp(get_authorized_session()),
+    )
+
+def get_drive_service():
+    return get_service("drive", "v3")
+
+def get_docs_service():
+    return get_service("docs", "v1")
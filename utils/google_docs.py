@@ -1,26 +1,13 @@
-import json
-from googleapiclient.discovery import build
-from google.oauth2 import service_account
-import streamlit as st
-
-SCOPES = [
-    "https://www.googleapis.com/auth/drive",
-    "https://www.googleapis.com/auth/documents"
-]
-
-def _get_credentials():
-    creds_raw = st.secrets["gdrive_credentials"]
-    creds_dict = json.loads(creds_raw) if isinstance(creds_raw, str) else creds_raw
-    return service_account.Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
+from utils.google_clients import get_drive_service, get_docs_service
+from utils.tracing import traced
 
 def _get_docs_service():
-    creds = _get_credentials()
-    return build("docs", "v1", credentials=creds)
+    return get_docs_service()
 
 def _get_drive_service():
-    creds = _get_credentials()
-    return build("drive", "v3", credentials=creds)
+    return get_drive_service()
 
+@traced()
 def generate_rental_agreement_doc(
     renter_name: str,
     start_date: str,
@@ -1,30 +1,250 @@
-import json
-import streamlit as st
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
-from google.oauth2 import service_account
+import threading
+import time
+from datetime import date
 
-SCOPES = ["https://www.googleapis.com/auth/drive"]
+from utils.google_clients import get_drive_service
+from utils.local_store import connect
+from utils.receipt_images import compress_receipt
+from utils import receipt_index
+from utils.config import (
+    DRIVE_UPLOAD_CHUNK_MB, COMPRESS_RECEIPTS, MONTHLY_FOLDERS, DRIVE_FOLDER_ID, get_drive_folder_id
+)
+from utils.tracing import traced
+
+# --- Resumable upload settings (chunks must be a multiple of 256 KB) ---
+UPLOAD_CHUNK_SIZE = max(1, int(DRIVE_UPLOAD_CHUNK_MB * 4)) * 256 * 1024
+UPLOAD_RETRIES = 5
+
+# --- YYYY/Month folder ids are remembered on disk for this long ---
+FOLDER_MIME = "application/vnd.google-apps.folder"
+FOLDER_CACHE_TTL = 7 * 24 * 3600
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+
+_FOLDER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drive_folders (
+    parent_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    folder_id TEXT NOT NULL,
+    resolved_at REAL NOT NULL,
+    PRIMARY KEY (parent_id, name)
+);
+"""
 
 def _get_drive_service():
-    creds_raw = st.secrets["gdrive_credentials"]
-    creds_dict = json.loads(creds_raw) if isinstance(creds_raw, str) else creds_raw
-    creds = service_account.Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
-    return build("drive", "v3", credentials=creds)
+    return get_drive_service()
+
+# --- Bytes exactly as they would be uploaded, with their md5 ---
+def _prepare_upload(uploaded_file, mimetype: str | None, compress: bool) -> tuple:
+    mimetype = mimetype or getattr(uploaded_file, "type", None) or "application/octet-stream"
+    stream = uploaded_file
+    if compress:
+        stream, mimetype = compress_receipt(stream, mimetype)
+    return stream, mimetype, receipt_index.content_md5(stream)
+
+# --- Existing Drive file with identical content, if it is still there ---
+def _existing_file_id(md5: str) -> str | None:
+    file_id = receipt_index.lookup(md5)
+    if not file_id:
+        return None
+    try:
+        meta = _get_drive_service().files().get(fileId=file_id, fields="id, trashed").execute()
+        if not meta.get("trashed"):
+            return file_id
+    except Exception:
+        pass
+    receipt_index.forget(md5)
+    return None
+
+@traced()
+def upload_file_to_drive(
+    uploaded_file,
+    filename: str,
+    folder_id: str,
+    mimetype: str | None = None,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+    compress: bool = COMPRESS_RECEIPTS,
+) -> str:
+    """Stream a file-like object to Drive through a resumable upload session.
+
+    Content already on Drive (same md5 after compression) is not uploaded again;
+    the existing file id is returned instead.
+    """
+    from googleapiclient.http import MediaIoBaseUpload
+
+    stream, mimetype, md5 = _prepare_upload(uploaded_file, mimetype, compress)
+    existing = _existing_file_id(md5)
+    if existing:
+        return existing
 
-def upload_file_to_drive(uploaded_file, filename: str, folder_id: str) -> str:
     service = _get_drive_service()
-    media = MediaIoBaseUpload(uploaded_file, mimetype=uploaded_file.type)
+    media = MediaIoBaseUpload(stream, mimetype=mimetype, chunksize=chunk_size, resumable=True)
     file_metadata = {
         "name": filename,
         "parents": [folder_id]
     }
-    file = service.files().create(
+    request = service.files().create(
         body=file_metadata,
         media_body=media,
         fields="id"
-    ).execute()
-    return file.get("id")
+    )
+
+    # next_chunk retries 429/5xx itself; after a dropped connection it asks Drive
+    # how much arrived and resumes from there
+    response, failures = None, 0
+    while response is None:
+        try:
+            _, response = request.next_chunk(num_retries=UPLOAD_RETRIES)
+            failures = 0
+        except OSError:  # socket and requests connection errors
+            failures += 1
+            if failures > UPLOAD_RETRIES:
+                raise
+            time.sleep(2 ** failures)
+
+    file_id = response.get("id")
+    receipt_index.record(md5, file_id, folder_id, filename)
+    return file_id
+
+# --- Rebuild the dedup index from md5Checksum of files in the configured/resolved month folders ---
+@traced()
+def rebuild_receipt_index(monthly_folders: dict = MONTHLY_FOLDERS) -> int:
+    service = _get_drive_service()
+    folder_ids = {folder_id for months in monthly_folders.values() for folder_id in months.values()}
+    folder_ids |= _resolved_month_folder_ids()
+
+    entries = []
+    for folder_id in sorted(folder_ids):
+        page_token = None
+        while True:
+            result = service.files().list(
+                q=f"'{folder_id}' in parents and trashed = false",
+                fields="nextPageToken, files(id, name, md5Checksum)",
+                pageSize=1000,
+                pageToken=page_token,
+            ).execute()
+            entries += [
+                (f["md5Checksum"], f["id"], folder_id, f["name"])
+                for f in result.get("files", [])
+                if f.get("md5Checksum")
+            ]
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                break
+    return receipt_index.rebuild(entries)
 
 def generate_drive_link(file_id: str) -> str:
     return f"https://drive.google.com/file/d/{file_id}/view"
+
+# --- Persistent folder cache: (parent, name) -> folder id ---
+def _resolved_month_folder_ids() -> set:
+    with connect() as conn:
+        conn.executescript(_FOLDER_SCHEMA)
+        rows = conn.execute(
+            f"SELECT folder_id FROM drive_folders WHERE name IN ({', '.join('?' * len(MONTHS))})",
+            MONTHS,
+        ).fetchall()
+    return {folder_id for (folder_id,) in rows}
+
+def _cached_folder(parent_id: str, name: str) -> str | None:
+    with connect() as conn:
+        conn.executescript(_FOLDER_SCHEMA)
+        row = conn.execute(
+            "SELECT folder_id FROM drive_folders WHERE parent_id = ? AND name = ? AND resolved_at > ?",
+            (parent_id, name, time.time() - FOLDER_CACHE_TTL),
+        ).fetchone()
+    return row[0] if row else None
+
+def _cache_folders(parent_id: str, folders: dict) -> None:
+    now = time.time()
+    with connect() as conn:
+        conn.executescript(_FOLDER_SCHEMA)
+        conn.executemany(
+            "INSERT OR REPLACE INTO drive_folders VALUES (?, ?, ?, ?)",
+            [(parent_id, name, folder_id, now) for name, folder_id in folders.items()],
+        )
+
+# --- One list call caches every child folder of a parent ---
+def _list_child_folders(service, parent_id: str) -> dict:
+    folders, page_token = {}, None
+    while True:
+        result = service.files().list(
+            q=f"'{parent_id}' in parents and mimeType = '{FOLDER_MIME}' and trashed = false",
+            fields="nextPageToken, files(id, name)",
+            pageSize=1000,
+            pageToken=page_token,
+        ).execute()
+        for f in result.get("files", []):
+            folders.setdefault(f["name"], f["id"])
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            break
+    _cache_folders(parent_id, folders)
+    return folders
+
+def _create_folder(service, parent_id: str, name: str) -> str:
+    body = {"name": name, "mimeType": FOLDER_MIME, "parents": [parent_id]}
+    folder_id = service.files().create(body=body, fields="id").execute()["id"]
+    _cache_folders(parent_id, {name: folder_id})
+    return folder_id
+
+# --- Upload workers resolve folders concurrently; list-then-create must not interleave ---
+_folder_lock = threading.RLock()
+
+def _find_or_create_folder(service, parent_id: str, name: str) -> str:
+    folder_id = _cached_folder(parent_id, name)
+    if folder_id:
+        return folder_id
+    with _folder_lock:
+        # Another thread may have created it while we waited
+        folder_id = _cached_folder(parent_id, name)
+        if folder_id:
+            return folder_id
+        return _list_child_folders(service, parent_id).get(name) or _create_folder(service, parent_id, name)
+
+# --- YYYY/Month folder for an entry date (secrets map first, then Drive) ---
+@traced()
+def resolve_month_folder(entry_date: date) -> str:
+    static_id = get_drive_folder_id(entry_date)
+    if static_id:
+        return static_id
+
+    service = _get_drive_service()
+    year_id = _find_or_create_folder(service, DRIVE_FOLDER_ID, str(entry_date.year))
+    return _find_or_create_folder(service, year_id, entry_date.strftime("%B"))
+
+# --- Create a whole year's month folders in one batch request ---
+@traced()
+def ensure_year_folders(year: str) -> dict:
+    with _folder_lock:
+        return _ensure_year_folders(year)
+
+def _ensure_year_folders(year: str) -> dict:
+    service = _get_drive_service()
+    year_id = _find_or_create_folder(service, DRIVE_FOLDER_ID, str(year))
+    existing = _list_child_folders(service, year_id)
+    missing = [month for month in MONTHS if month not in existing]
+
+    if missing:
+        created, errors = {}, []
+
+        def on_create(request_id, response, exception):
+            if exception is not None:
+                errors.append(exception)
+            else:
+                created[request_id] = response["id"]
+
+        batch = service.new_batch_http_request(callback=on_create)
+        for month in missing:
+            body = {"name": month, "mimeType": FOLDER_MIME, "parents": [year_id]}
+            batch.add(service.files().create(body=body, fields="id"), request_id=month)
+        batch.execute()
+
+        _cache_folders(year_id, created)
+        existing.update(created)
+        if errors:
+            raise errors[0]
+
+    return {month: existing[month] for month in MONTHS if month in existing}
@@ -1,39 +1,153 @@
-import json
+import logging
+import random
+import re
+import time
 import pandas as pd
-import streamlit as st
 import gspread
-from google.oauth2.service_account import Credentials
+from gspread.utils import rowcol_to_a1
 
-# --- Shared scopes for both Sheets & Drive ---
-SCOPES = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive",
-]
+from utils import ledger_mirror
+from utils.cache import cached
+from utils.google_clients import (
+    HTTP_TIMEOUT, get_credentials, get_authorized_session, get_local_backend, storage_backend
+)
+from utils.tracing import traced
 
-# --- Load service account credentials once ---
-@st.cache_resource(show_spinner=False)
+logger = logging.getLogger(__name__)
+
+# --- gspread client on the shared credentials and pooled session ---
+@cached(resource=True)
 def get_gspread_client() -> gspread.Client:
-    creds_dict = json.loads(st.secrets["gdrive_credentials"])
-    creds = Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
-    return gspread.authorize(creds)
+    if storage_backend() == "local":
+        from utils.local_backend import LocalSheetsClient
+
+        return LocalSheetsClient(get_local_backend())
+    return gspread.Client(auth=get_credentials(), session=get_authorized_session())
+
+# --- Handle lifetimes (seconds); open_by_key/worksheet are metadata fetches ---
+HANDLE_TTL = 3600
+
+# --- Cached Spreadsheet / Worksheet handles ---
+@cached(ttl=HANDLE_TTL, resource=True)
+def get_spreadsheet(sheet_id: str) -> gspread.Spreadsheet:
+    return get_gspread_client().open_by_key(sheet_id)
 
-# --- Sheet accessor ---
+@cached(ttl=HANDLE_TTL, resource=True)
 def get_worksheet(sheet_id: str, tab_name: str) -> gspread.Worksheet:
-    client = get_gspread_client()
-    return client.open_by_key(sheet_id).worksheet(tab_name)
+    return get_spreadsheet(sheet_id).worksheet(tab_name)
+
+# --- Header maps live no longer than the frames they are checked against (see get_write_header_map) ---
+HEADER_TTL = 300
+
+# --- Cached header row: column name -> 1-based column numbers (a name may repeat) ---
+@cached(ttl=HEADER_TTL)
+@traced()
+def get_header_map(sheet_id: str, tab_name: str) -> dict:
+    headers = get_worksheet(sheet_id, tab_name).row_values(1)
+    header_map = {}
+    for i, col in enumerate(headers):
+        if col:
+            header_map.setdefault(col, []).append(i + 1)
+    return header_map
+
+# --- Header map checked against the columns a write was built from; re-read once if they differ ---
+def _header_columns(header_map: dict) -> list:
+    columns = [""] * max((max(col_nums) for col_nums in header_map.values()), default=0)
+    for col, col_nums in header_map.items():
+        for col_num in col_nums:
+            columns[col_num - 1] = col
+    return columns
+
+def _same_columns(header_map: dict, columns) -> bool:
+    expected = [str(col) for col in columns]
+    while expected and not expected[-1]:
+        expected.pop()
+    return _header_columns(header_map) == expected
+
+def get_write_header_map(sheet_id: str, tab_name: str, columns=None) -> dict:
+    """The tab's header map, refused (ValueError) unless it matches `columns` (default: the
+    mirrored header). Writing by a stale map would put values under the wrong columns."""
+    if columns is None:
+        columns = ledger_mirror.header(sheet_id, tab_name)
+    header_map = get_header_map(sheet_id, tab_name)
+    if columns is None or _same_columns(header_map, columns):
+        return header_map
+
+    get_header_map.invalidate(sheet_id, tab_name)
+    header_map = get_header_map(sheet_id, tab_name)
+    if _same_columns(header_map, columns):
+        return header_map
+
+    from utils import write_through
+    write_through.invalidate_tab(sheet_id, tab_name)
+    raise ValueError(f"The columns of '{tab_name}' changed since it was loaded; reload the page and try again.")
+
+# --- Drop cached handles and headers (e.g. after tabs or columns change) ---
+def invalidate_sheet_handles() -> None:
+    get_spreadsheet.clear()
+    get_worksheet.clear()
+    get_header_map.clear()
+
+# --- Retry quota (429) and transient server errors with exponential backoff ---
+RETRY_STATUS_CODES = {429, 500, 502, 503}
+
+def _with_backoff(fn, *args, retries: int = 5, base_delay: float = 1.0, **kwargs):
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            if getattr(e, "code", None) not in RETRY_STATUS_CODES or attempt == retries:
+                raise
+            time.sleep(base_delay * 2 ** attempt + random.uniform(0, base_delay))
+
+# --- Drive's version number for the spreadsheet; it moves on every edit, by anyone ---
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files/"
+
+def get_sheet_version(sheet_id: str) -> str | None:
+    """None when Drive can't be asked; the mirror then falls back to tail probes and timed resyncs."""
+    try:
+        if storage_backend() == "local":
+            return get_local_backend().sheet_version(sheet_id)
+        response = get_authorized_session().get(
+            DRIVE_FILES_URL + sheet_id, params={"fields": "version", "supportsAllDrives": "true"}, timeout=HTTP_TIMEOUT
+        )
+        response.raise_for_status()
+        return str(response.json()["version"])
+    except Exception:
+        logger.warning("Could not read the Drive version of %s", sheet_id, exc_info=True)
+        return None
+
+# --- The sheet's version before a write, if the tab's mirror is complete at it (nobody else wrote since) ---
+def _version_before_write(sheet_id: str, tab_name: str) -> str | None:
+    mirrored = ledger_mirror.version(sheet_id, tab_name)
+    if mirrored is None:
+        return None
+    return mirrored if get_sheet_version(sheet_id) == mirrored else None
 
 # --- Load a tab as a DataFrame ---
-@st.cache_data(ttl=300, show_spinner=False)
+@cached(ttl=300)
 def load_sheet_as_df(sheet_id: str, tab_name: str) -> pd.DataFrame:
-    ws = get_worksheet(sheet_id, tab_name)
-    values = ws.get_all_values()
-    if not values:
-        return pd.DataFrame()
+    return load_sheets_as_dfs(sheet_id, (tab_name,))[tab_name]
+
+# --- Load several tabs via the local mirror (one values.batchGet round trip) ---
+@cached(ttl=300)
+@traced()
+def load_sheets_as_dfs(sheet_id: str, tab_names: tuple) -> dict:
+    tab_names = tuple(tab_names)
+    if not tab_names:
+        return {}
 
-    header_idx = next((i for i, row in enumerate(values) if any(cell.strip() for cell in row)), 0)
-    header = values[header_idx]
-    data = values[header_idx + 1:]
-    return pd.DataFrame(data, columns=header)
+    try:
+        changed = ledger_mirror.sync_tabs(get_spreadsheet(sheet_id), sheet_id, tab_names, get_sheet_version(sheet_id))
+        for tab in changed:
+            get_header_map.invalidate(sheet_id, tab)  # columns moved; writes must not use the old numbers
+    except Exception:
+        # Sheets unreachable or slow: serve the last mirrored copy if we have one
+        if not all(ledger_mirror.has_tab(sheet_id, tab) for tab in tab_names):
+            raise
+        logger.warning("Sheets sync failed; serving mirrored data for %s", ", ".join(tab_names), exc_info=True)
+
+    return {tab: ledger_mirror.read_tab(sheet_id, tab) for tab in tab_names}
 
 # --- Append a full list row ---
 def append_row(sheet_id: str, tab_name: str, row_data: list) -> None:
@@ -41,22 +155,76 @@ def append_row(sheet_id: str, tab_name: str, row_data: list) -> None:
     ws.append_row(row_data, value_input_option="USER_ENTERED")
 
 # --- Append a row by header-keyed dict ---
-def append_row_to_sheet(sheet_id: str, tab_name: str, row_dict: dict) -> None:
-    ws = get_worksheet(sheet_id, tab_name)
-    headers = ws.row_values(1)
-    if not headers:
+@traced()
+def append_row_to_sheet(sheet_id: str, tab_name: str, row_dict: dict) -> int | None:
+    header_map = get_write_header_map(sheet_id, tab_name)
+    if not header_map:
         raise ValueError(f"Tab '{tab_name}' has no header row.")
 
-    row = [row_dict.get(col, "") for col in headers]
-    ws.append_row(row, value_input_option="USER_ENTERED")
+    # Every column under a repeated header gets the value, as when rows were built from the header list
+    row = [""] * max(max(col_nums) for col_nums in header_map.values())
+    for col, col_nums in header_map.items():
+        for col_num in col_nums:
+            row[col_num - 1] = row_dict.get(col, "")
+
+    ws = get_worksheet(sheet_id, tab_name)
+    before = _version_before_write(sheet_id, tab_name)
+    response = ws.append_row(row, value_input_option="USER_ENTERED", include_values_in_response=True)
+
+    from utils import write_through
+    write_through.after_append(sheet_id, tab_name, response, before)
+    return _appended_row_number(response)
+
+# --- Sheet row number written by values.append ("'Tab'!A57:Q57" -> 57) ---
+def _appended_row_number(response: dict) -> int | None:
+    updated_range = (response or {}).get("updates", {}).get("updatedRange", "")
+    match = re.search(r"![A-Z]+(\d+)", updated_range)
+    return int(match.group(1)) if match else None
+
+# --- Current value of one cell, read live (not from the mirror) ---
+def read_cell(sheet_id: str, tab_name: str, row_index: int, column: str) -> str:
+    header_map = get_write_header_map(sheet_id, tab_name)
+    if column not in header_map:
+        raise ValueError(f"Tab '{tab_name}' has no '{column}' column.")
+    a1 = rowcol_to_a1(row_index + 2, header_map[column][0])  # header + 0-index offset
+    values = get_worksheet(sheet_id, tab_name).get_values(a1)
+    return values[0][0] if values and values[0] else ""
 
 # --- Update existing row by dict of column updates ---
+@traced()
 def update_row_in_sheet(sheet_id: str, tab_name: str, row_index: int, updates: dict) -> None:
     ws = get_worksheet(sheet_id, tab_name)
-    headers = ws.row_values(1)
+    header_map = get_write_header_map(sheet_id, tab_name)
     row_number = row_index + 2  # header + 0-index offset
 
     for col, value in updates.items():
-        if col in headers:
-            col_num = headers.index(col) + 1
-            ws.update_cell(row_number, col_num, value)
+        if col in header_map:
+            ws.update_cell(row_number, header_map[col][0], value)
+
+    from utils import write_through
+    write_through.invalidate_tab(sheet_id, tab_name)
+
+# --- Write many cells in one values.batchUpdate ---
+@traced()
+def update_cells_in_sheet(sheet_id: str, tab_name: str, cells: list, columns=None) -> set:
+    """Write (row_index, column, value) cells in one request; returns the row indexes written.
+    columns: the header of the frame the edits came from, checked against the sheet's."""
+    header_map = get_write_header_map(sheet_id, tab_name, columns)
+    data, written = [], []
+    for row_index, col, value in cells:
+        if col not in header_map:
+            continue
+        a1 = rowcol_to_a1(row_index + 2, header_map[col][0])  # header + 0-index offset
+        data.append({"range": a1, "values": [[value]]})
+        written.append((row_index, col))
+
+    if data:
+        ws = get_worksheet(sheet_id, tab_name)
+        before = _version_before_write(sheet_id, tab_name)
+        response = _with_backoff(
+            ws.batch_update, data, value_input_option="USER_ENTERED", include_values_in_response=True
+        )
+
+        from utils import write_through
+        write_through.after_update(sheet_id, tab_name, written, response, before)
+    return {row_index for row_index, _ in written}
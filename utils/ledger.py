@@ -0,0 +1,80 @@
+import pandas as pd
+
+from utils.cache import cached
+from utils.google_sheets import load_sheets_as_dfs
+from utils.config import SHEET_ID
+from utils.tracing import traced
+
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+
+# --- Column kinds per tab; columns not listed stay as stripped text ---
+INCOME_SCHEMA = {
+    "Month": "month",
+    "Property": "category",
+    "Income Source": "category",
+    "Status": "category",
+    "Check-in": "date",
+    "Check-out": "date",
+    "Amount Owed": "amount",
+    "Amount Received": "amount",
+    "Balance": "amount",
+}
+
+EXPENSE_SCHEMA = {
+    "Month": "month",
+    "Date": "date",
+    "Purchaser": "category",
+    "Property": "category",
+    "Category": "category",
+    "Amount": "amount",
+}
+
+# --- "$1,234.50" -> 1234.5; blanks and junk -> NaN ---
+def parse_amounts(series: pd.Series) -> pd.Series:
+    cleaned = series.astype(str).str.replace(r"[\$,\s]", "", regex=True)
+    return pd.to_numeric(cleaned, errors="coerce").round(2)
+
+def _to_month(series: pd.Series) -> pd.Series:
+    months = series.astype(str).str.strip().str.title()
+    extra = sorted(set(months.unique()) - set(MONTHS))
+    return pd.Categorical(months, categories=MONTHS + extra, ordered=True)
+
+# --- Convert raw sheet text to typed columns once ---
+@traced()
+def apply_schema(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    df = df.apply(lambda s: s.str.strip().fillna(s) if s.dtype == object else s)
+
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        if kind == "amount":
+            df[col] = parse_amounts(df[col]).fillna(0.0).astype(float)
+        elif kind == "category":
+            df[col] = df[col].astype("category")
+        elif kind == "month":
+            df[col] = _to_month(df[col])
+        elif kind == "date":
+            df[col] = pd.to_datetime(df[col], errors="coerce", format="mixed")
+    return df
+
+# --- Typed income/expense frames for a year, cleaned once per cache fill ---
+@cached(ttl=300)
+def load_ledger(year: str) -> tuple:
+    return load_ledgers((year,))[year]
+
+# --- Several years at once: every tab in one batched fetch ---
+@cached(ttl=300)
+@traced()
+def load_ledgers(years: tuple) -> dict:
+    tabs = {year: (f"{year} OPP Income", f"{year} OPP Expenses") for year in years}
+    dfs = load_sheets_as_dfs(SHEET_ID, tuple(tab for pair in tabs.values() for tab in pair))
+    return {
+        year: (
+            apply_schema(dfs[income_tab], INCOME_SCHEMA),
+            apply_schema(dfs[expense_tab], EXPENSE_SCHEMA),
+        )
+        for year, (income_tab, expense_tab) in tabs.items()
+    }
@@ -0,0 +1,310 @@
+import json
+import time
+import pandas as pd
+from gspread.utils import absolute_range_name, rowcol_to_a1
+
+from utils.local_store import connect
+from utils.tracing import traced
+
+# --- A tab whose content may have moved is downloaded in full at least this often (the old frame TTL);
+#     in between, only a header + tail probe runs, which can't see edits above the last mirrored row ---
+FULL_RESYNC_SECONDS = 300
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mirror_tabs (
+    sheet_id TEXT NOT NULL,
+    tab_name TEXT NOT NULL,
+    header TEXT NOT NULL,
+    header_row INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    last_row TEXT NOT NULL,
+    dirty INTEGER NOT NULL DEFAULT 0,
+    synced_at REAL NOT NULL,
+    full_synced_at REAL NOT NULL,
+    PRIMARY KEY (sheet_id, tab_name)
+);
+CREATE TABLE IF NOT EXISTS mirror_rows (
+    sheet_id TEXT NOT NULL,
+    tab_name TEXT NOT NULL,
+    row_num INTEGER NOT NULL,
+    row_values TEXT NOT NULL,
+    PRIMARY KEY (sheet_id, tab_name, row_num)
+);
+CREATE TABLE IF NOT EXISTS mirror_versions (
+    sheet_id TEXT NOT NULL,
+    tab_name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    PRIMARY KEY (sheet_id, tab_name)
+);
+"""
+
+# --- First non-empty row is the header; pad/trim data rows to its width ---
+def split_header(values: list) -> tuple:
+    """Return (header_idx, header, rows) for raw sheet values."""
+    header_idx = next((i for i, row in enumerate(values) if any(cell.strip() for cell in row)), 0)
+    header = values[header_idx] if values else []
+    rows = [_pad(row, len(header)) for row in values[header_idx + 1:]]
+    return header_idx, header, rows
+
+def _pad(row: list, width: int) -> list:
+    return (list(row) + [""] * (width - len(row)))[:width]
+
+def _tab_state(conn, sheet_id: str, tab_name: str):
+    row = conn.execute(
+        "SELECT t.header, t.header_row, t.row_count, t.last_row, t.dirty, t.full_synced_at, v.version "
+        "FROM mirror_tabs t LEFT JOIN mirror_versions v USING (sheet_id, tab_name) "
+        "WHERE t.sheet_id = ? AND t.tab_name = ?",
+        (sheet_id, tab_name),
+    ).fetchone()
+    if row is None:
+        return None
+    header, header_row, row_count, last_row, dirty, full_synced_at, version = row
+    return {
+        "header": json.loads(header),
+        "header_row": header_row,
+        "row_count": row_count,
+        "last_row": json.loads(last_row),
+        "dirty": bool(dirty),
+        "full_synced_at": full_synced_at,
+        "version": version,
+    }
+
+def _is_current(state, version: str) -> bool:
+    return state is not None and not state["dirty"] and state["version"] == version
+
+def _needs_full_sync(state) -> bool:
+    return (
+        state is None
+        or state["dirty"]
+        or not state["header"]
+        or time.time() - state["full_synced_at"] > FULL_RESYNC_SECONDS
+    )
+
+# --- Range covering the last mirrored row and everything below it ---
+def _tail_range(tab_name: str, state: dict) -> str:
+    start = state["header_row"] + max(state["row_count"], 1)
+    last_col = rowcol_to_a1(1, len(state["header"])).rstrip("0123456789")
+    return absolute_range_name(tab_name, f"A{start}:{last_col}")
+
+def _header_range(tab_name: str, state: dict) -> str:
+    row = state["header_row"]
+    return absolute_range_name(tab_name, f"{row}:{row}")
+
+def _store_full(conn, sheet_id: str, tab_name: str, values: list, now: float, version: str | None) -> None:
+    header_idx, header, rows = split_header(values)
+    if version is None:
+        conn.execute("DELETE FROM mirror_versions WHERE sheet_id = ? AND tab_name = ?", (sheet_id, tab_name))
+    else:
+        conn.execute("INSERT OR REPLACE INTO mirror_versions VALUES (?, ?, ?)", (sheet_id, tab_name, version))
+    conn.execute("DELETE FROM mirror_rows WHERE sheet_id = ? AND tab_name = ?", (sheet_id, tab_name))
+    conn.executemany(
+        "INSERT INTO mirror_rows VALUES (?, ?, ?, ?)",
+        [(sheet_id, tab_name, i, json.dumps(row)) for i, row in enumerate(rows)],
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO mirror_tabs VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)",
+        (sheet_id, tab_name, json.dumps(header), header_idx + 1, len(rows),
+         json.dumps(rows[-1] if rows else []), now, now),
+    )
+
+def _store_tail(conn, sheet_id: str, tab_name: str, state: dict, new_rows: list, now: float) -> None:
+    start = state["row_count"]
+    conn.executemany(
+        "INSERT OR REPLACE INTO mirror_rows VALUES (?, ?, ?, ?)",
+        [(sheet_id, tab_name, start + i, json.dumps(row)) for i, row in enumerate(new_rows)],
+    )
+    last_row = new_rows[-1] if new_rows else state["last_row"]
+    conn.execute(
+        "UPDATE mirror_tabs SET row_count = ?, last_row = ?, synced_at = ? "
+        "WHERE sheet_id = ? AND tab_name = ?",
+        (start + len(new_rows), json.dumps(last_row), now, sheet_id, tab_name),
+    )
+
+# --- Bring the mirror up to date ---
+@traced()
+def sync_tabs(spreadsheet, sheet_id: str, tab_names: tuple, version: str | None = None) -> list:
+    """version is the spreadsheet's Drive version; it moves on every edit, by anyone, anywhere
+    in the file. A tab last downloaded in full at that version is current and costs nothing.
+    Any other tab (or every tab, without a version) is probed: its header and the rows from
+    the last mirrored one down. New rows are appended; a changed header or last row means
+    rows moved, and the tab is downloaded in full. Edits above the tail are only caught by
+    the full download every FULL_RESYNC_SECONDS, which a moved version alone doesn't force:
+    an edit to another tab, or the app's own write-through, costs a probe, not a download.
+
+    Returns the tabs whose header row changed (or was first seen), so cached column maps can be dropped."""
+    with connect() as conn:
+        conn.executescript(_SCHEMA)
+        states = {tab: _tab_state(conn, sheet_id, tab) for tab in tab_names}
+
+    stale = [tab for tab in tab_names if version is None or not _is_current(states[tab], version)]
+    full_tabs = [tab for tab in stale if _needs_full_sync(states[tab])]
+    incremental_tabs = [tab for tab in stale if tab not in full_tabs]
+    if not full_tabs and not incremental_tabs:
+        return []
+
+    # One batchGet: the whole of each cold tab, plus header + tail probes for warm tabs
+    ranges = [absolute_range_name(tab) for tab in full_tabs]
+    for tab in incremental_tabs:
+        ranges += [_header_range(tab, states[tab]), _tail_range(tab, states[tab])]
+    value_ranges = spreadsheet.values_batch_get(ranges).get("valueRanges", [])
+    values = [vr.get("values", []) for vr in value_ranges]
+
+    now = time.time()
+    resync = []
+    with connect() as conn:
+        for tab, tab_values in zip(full_tabs, values):
+            _store_full(conn, sheet_id, tab, tab_values, now, version)
+        changed = [tab for tab in full_tabs if _header_changed(conn, sheet_id, tab, states[tab])]
+
+        probes = values[len(full_tabs):]
+        for i, tab in enumerate(incremental_tabs):
+            state = states[tab]
+            width = len(state["header"])
+            header_values, tail = probes[2 * i], probes[2 * i + 1]
+            header = header_values[0] if header_values else []
+            tail = [_pad(row, width) for row in tail]
+
+            if state["row_count"]:
+                # The previously-last row must be unchanged, otherwise rows moved or were edited
+                if not tail or tail[0] != state["last_row"]:
+                    resync.append(tab)
+                    continue
+                tail = tail[1:]
+            if header != state["header"]:
+                resync.append(tab)
+                continue
+            _store_tail(conn, sheet_id, tab, state, tail, now)
+
+    if resync:
+        value_ranges = spreadsheet.values_batch_get(
+            [absolute_range_name(tab) for tab in resync]
+        ).get("valueRanges", [])
+        with connect() as conn:
+            for tab, vr in zip(resync, value_ranges):
+                # version was read before this fetch, so at worst the next sync probes again
+                _store_full(conn, sheet_id, tab, vr.get("values", []), now, version)
+            changed += [tab for tab in resync if _header_changed(conn, sheet_id, tab, states[tab])]
+    return changed
+
+def _header_changed(conn, sheet_id: str, tab_name: str, before) -> bool:
+    after = _tab_state(conn, sheet_id, tab_name)
+    if before is None or after is None:
+        return True
+    return (before["header_row"], before["header"]) != (after["header_row"], after["header"])
+
+# --- Flag a tab for a full resync (rows were edited in place) ---
+def mark_dirty(sheet_id: str, tab_name: str) -> None:
+    with connect() as conn:
+        conn.executescript(_SCHEMA)
+        conn.execute(
+            "UPDATE mirror_tabs SET dirty = 1 WHERE sheet_id = ? AND tab_name = ?",
+            (sheet_id, tab_name),
+        )
+
+# --- Write-through: apply the app's own writes so the next sync finds nothing to fetch ---
+def append_rows(sheet_id: str, tab_name: str, first_row: int, rows: list) -> int | None:
+    """Add rows written at sheet row first_row; returns their first read_tab index, or None
+    (mirror untouched) unless they directly follow the mirrored rows."""
+    with connect() as conn:
+        conn.executescript(_SCHEMA)
+        state = _tab_state(conn, sheet_id, tab_name)
+        if state is None or state["dirty"] or not state["header"]:
+            return None
+        if first_row != state["header_row"] + state["row_count"] + 1:
+            return None  # rows were added elsewhere in between; the next sync's tail probe fetches them all
+        width = len(state["header"])
+        _store_tail(conn, sheet_id, tab_name, state, [_pad(row, width) for row in rows], time.time())
+    return state["row_count"]
+
+def update_cells(sheet_id: str, tab_name: str, cells: list) -> bool:
+    """Apply (row_num, column, value) edits, row_num as in read_tab's index; False if any can't be placed."""
+    with connect() as conn:
+        conn.executescript(_SCHEMA)
+        state = _tab_state(conn, sheet_id, tab_name)
+        if state is None or state["dirty"] or state["header_row"] != 1:
+            return False
+        columns = {}
+        for i, col in enumerate(state["header"]):
+            columns.setdefault(col, i)
+
+        rows = {}
+        for row_num, col, value in cells:
+            if col not in columns or not 0 <= row_num < state["row_count"]:
+                return False
+            rows.setdefault(row_num, []).append((columns[col], value))
+
+        for row_num, updates in rows.items():
+            (stored,) = conn.execute(
+                "SELECT row_values FROM mirror_rows WHERE sheet_id = ? AND tab_name = ? AND row_num = ?",
+                (sheet_id, tab_name, row_num),
+            ).fetchone()
+            row = json.loads(stored)
+            for i, value in updates:
+                row[i] = value
+            conn.execute(
+                "UPDATE mirror_rows SET row_values = ? WHERE sheet_id = ? AND tab_name = ? AND row_num = ?",
+                (json.dumps(row), sheet_id, tab_name, row_num),
+            )
+            if row_num == state["row_count"] - 1:
+                # Keep the tail probe's reference row in step, or the next sync would resync in full
+                conn.execute(
+                    "UPDATE mirror_tabs SET last_row = ? WHERE sheet_id = ? AND tab_name = ?",
+                    (json.dumps(row), sheet_id, tab_name),
+                )
+    return True
+
+def header(sheet_id: str, tab_name: str) -> list | None:
+    """The mirrored header when it is sheet row 1 (where writes address columns), else None."""
+    with connect() as conn:
+        conn.executescript(_SCHEMA)
+        state = _tab_state(conn, sheet_id, tab_name)
+    if state is None or state["dirty"] or state["header_row"] != 1:
+        return None
+    return state["header"]
+
+def version(sheet_id: str, tab_name: str) -> str | None:
+    """Drive version the tab was last known complete at; None if unknown or marked for resync."""
+    with connect() as conn:
+        conn.executescript(_SCHEMA)
+        state = _tab_state(conn, sheet_id, tab_name)
+    return None if state is None or state["dirty"] else state["version"]
+
+def advance_version(sheet_id: str, before: str, after: str | None) -> None:
+    """The app's own write moved the sheet from before to after and is already applied here:
+    tabs that were complete at before are complete at after."""
+    if after is None:
+        return
+    with connect() as conn:
+        conn.executescript(_SCHEMA)
+        conn.execute(
+            "UPDATE mirror_versions SET version = ? WHERE sheet_id = ? AND version = ? AND tab_name IN "
+            "(SELECT tab_name FROM mirror_tabs WHERE sheet_id = ? AND dirty = 0)",
+            (after, sheet_id, before, sheet_id),
+        )
+
+def has_tab(sheet_id: str, tab_name: str) -> bool:
+    with connect() as conn:
+        conn.executescript(_SCHEMA)
+        return _tab_state(conn, sheet_id, tab_name) is not None
+
+# --- Read a mirrored tab from disk ---
+@traced()
+def read_tab(sheet_id: str, tab_name: str) -> pd.DataFrame:
+    with connect() as conn:
+        conn.executescript(_SCHEMA)
+        state = _tab_state(conn, sheet_id, tab_name)
+        if state is None or not state["header"]:
+            return pd.DataFrame()
+        rows = conn.execute(
+            "SELECT row_values FROM mirror_rows WHERE sheet_id = ? AND tab_name = ? ORDER BY row_num",
+            (sheet_id, tab_name),
+        ).fetchall()
+    return pd.DataFrame([json.loads(r) for (r,) in rows], columns=state["header"])
+
+# --- Forget every mirrored tab; the next load does a full sync ---
+def clear() -> None:
+    with connect() as conn:
+        conn.executescript(_SCHEMA)
+        conn.execute("DELETE FROM mirror_rows")
+        conn.execute("DELETE FROM mirror_tabs")
+        conn.execute("DELETE FROM mirror_versions")
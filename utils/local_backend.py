@@ -0,0 +1,545 @@
+"""Offline stand-ins for the Google clients, selected with storage_backend = "local".
+
+The objects mirror the slice of the gspread and googleapiclient APIs the app
+uses, so the real read/append/update/upload code paths run unchanged. Data
+lives in its own SQLite file (separate from the ledger mirror) plus one file
+per Drive upload. Latency and quota errors can be simulated per call.
+"""
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import shutil
+import threading
+import time
+import uuid
+
+from gspread.utils import a1_range_to_grid_range, rowcol_to_a1
+
+from utils import tracing
+from utils.local_store import CACHE_DIR, connect
+
+DEFAULT_ROOT = os.path.join(CACHE_DIR, "local_backend")
+FOLDER_MIME = "application/vnd.google-apps.folder"
+DOC_MIME = "application/vnd.google-apps.document"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS local_tabs (
+    sheet_id TEXT NOT NULL,
+    tab_name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (sheet_id, tab_name)
+);
+CREATE TABLE IF NOT EXISTS local_rows (
+    sheet_id TEXT NOT NULL,
+    tab_name TEXT NOT NULL,
+    row_number INTEGER NOT NULL,
+    cells TEXT NOT NULL,
+    PRIMARY KEY (sheet_id, tab_name, row_number)
+);
+CREATE TABLE IF NOT EXISTS local_files (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    mime_type TEXT NOT NULL,
+    parents TEXT NOT NULL,
+    md5 TEXT,
+    size INTEGER NOT NULL DEFAULT 0,
+    trashed INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS local_sheets (
+    sheet_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+# --- Errors shaped like the real ones, so retry/backoff code sees what it would in production ---
+def _error_body(status: int, message: str) -> bytes:
+    return json.dumps({"error": {"code": status, "message": message}}).encode()
+
+def sheets_error(status: int, message: str):
+    import requests
+    from gspread.exceptions import APIError
+
+    response = requests.Response()
+    response.status_code = status
+    response._content = _error_body(status, message)
+    return APIError(response)
+
+def http_error(status: int, message: str):
+    import httplib2
+    from googleapiclient.errors import HttpError
+
+    return HttpError(httplib2.Response({"status": status}), _error_body(status, message))
+
+# --- Shared storage and fault injection ---
+class LocalBackend:
+    def __init__(self, root: str = DEFAULT_ROOT, latency_ms: float = 0, error_rate: float = 0.0, seed=None):
+        self.root = root
+        self.db_path = os.path.join(root, "backend.sqlite")
+        self.files_dir = os.path.join(root, "files")
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        os.makedirs(self.files_dir, exist_ok=True)
+        with connect(self.db_path) as conn:
+            conn.executescript(_SCHEMA)
+
+    def connect(self):
+        return connect(self.db_path)
+
+    def api_call(self, service: str) -> None:
+        """One simulated round trip: sleep for the latency, then maybe fail with a 429."""
+        tracing.record_api_call(service)
+        with self._lock:
+            self.calls += 1
+            jitter = self._random.uniform(0.5, 1.5)
+            fail = self._random.random() < self.error_rate
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000 * jitter)
+        if fail:
+            message = f"Quota exceeded for {service} (simulated)"
+            raise sheets_error(429, message) if service == "sheets" else http_error(429, message)
+
+    def reset(self) -> None:
+        with self.connect() as conn:
+            conn.executescript(
+                "DELETE FROM local_tabs; DELETE FROM local_rows; DELETE FROM local_files; DELETE FROM local_sheets;"
+            )
+        shutil.rmtree(self.files_dir, ignore_errors=True)
+        os.makedirs(self.files_dir, exist_ok=True)
+
+    # --- Seeding helpers for tests and benchmarks (no latency or errors) ---
+    def seed_tab(self, sheet_id: str, tab_name: str, values) -> None:
+        with self.connect() as conn:
+            _ensure_tab(conn, sheet_id, tab_name)
+            conn.execute("DELETE FROM local_rows WHERE sheet_id = ? AND tab_name = ?", (sheet_id, tab_name))
+            conn.executemany(
+                "INSERT INTO local_rows VALUES (?, ?, ?, ?)",
+                ((sheet_id, tab_name, i + 1, json.dumps([_cell(v) for v in row])) for i, row in enumerate(values)),
+            )
+            _bump_version(conn, sheet_id)
+
+    # --- Drive files.get(fields="version") for a spreadsheet ---
+    def sheet_version(self, sheet_id: str) -> str:
+        self.api_call("drive")
+        with self.connect() as conn:
+            row = conn.execute("SELECT version FROM local_sheets WHERE sheet_id = ?", (sheet_id,)).fetchone()
+        return str(row[0] if row else 0)
+
+    def put_file(self, name: str, content: bytes, mime_type: str, parents=(), file_id: str | None = None) -> str:
+        file_id = file_id or uuid.uuid4().hex
+        with open(self._path(file_id), "wb") as f:
+            f.write(content)
+        with self.connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO local_files VALUES (?, ?, ?, ?, ?, ?, 0, ?)",
+                (file_id, name, mime_type, json.dumps(list(parents)),
+                 hashlib.md5(content).hexdigest(), len(content), time.time()),
+            )
+        return file_id
+
+    def read_file(self, file_id: str) -> bytes:
+        with open(self._path(file_id), "rb") as f:
+            return f.read()
+
+    def _path(self, file_id: str) -> str:
+        return os.path.join(self.files_dir, file_id)
+
+def _cell(value) -> str:
+    return "" if value is None else str(value)
+
+def _bump_version(conn, sheet_id: str) -> None:
+    # Like Drive's file version: moves on every change to the spreadsheet
+    conn.execute(
+        "INSERT INTO local_sheets VALUES (?, 1) ON CONFLICT(sheet_id) DO UPDATE SET version = version + 1",
+        (sheet_id,),
+    )
+
+def _ensure_tab(conn, sheet_id: str, tab_name: str) -> None:
+    position = conn.execute("SELECT COUNT(*) FROM local_tabs WHERE sheet_id = ?", (sheet_id,)).fetchone()[0]
+    conn.execute("INSERT OR IGNORE INTO local_tabs VALUES (?, ?, ?)", (sheet_id, tab_name, position))
+
+# --- Sheets: gspread Client / Spreadsheet / Worksheet stand-ins ---
+def _split_range(range_name: str) -> tuple:
+    """Split "'Tab'!A5:F" into ("Tab", "A5:F"); a bare tab name covers the whole tab."""
+    if "!" in range_name:
+        tab, cells = range_name.rsplit("!", 1)
+    else:
+        tab, cells = range_name, ""
+    if tab.startswith("'") and tab.endswith("'"):
+        tab = tab[1:-1].replace("''", "'")
+    return tab, cells
+
+def _trim(rows: list) -> list:
+    """Drop trailing empty cells and rows, as the Sheets API does."""
+    trimmed = []
+    for row in rows:
+        end = len(row)
+        while end and row[end - 1] == "":
+            end -= 1
+        trimmed.append(row[:end])
+    while trimmed and not trimmed[-1]:
+        trimmed.pop()
+    return trimmed
+
+class LocalWorksheet:
+    def __init__(self, backend: LocalBackend, sheet_id: str, title: str):
+        self.backend = backend
+        self.spreadsheet_id = sheet_id
+        self.title = title
+
+    def _read(self, start_row: int = 1, end_row: int | None = None) -> list:
+        query = "SELECT row_number, cells FROM local_rows WHERE sheet_id = ? AND tab_name = ? AND row_number >= ?"
+        params = [self.spreadsheet_id, self.title, start_row]
+        if end_row is not None:
+            query += " AND row_number <= ?"
+            params.append(end_row)
+        with self.backend.connect() as conn:
+            stored = conn.execute(query + " ORDER BY row_number", params).fetchall()
+        rows, expected = [], start_row
+        for row_number, cells in stored:
+            rows += [[]] * (row_number - expected)
+            rows.append(json.loads(cells))
+            expected = row_number + 1
+        return rows
+
+    def get_values(self, cells: str = "") -> list:
+        grid = a1_range_to_grid_range(cells) if cells else {}
+        start_row = grid.get("startRowIndex", 0) + 1
+        end_row = grid.get("endRowIndex")
+        start_col = grid.get("startColumnIndex", 0)
+        end_col = grid.get("endColumnIndex")
+        rows = [row[start_col:end_col] for row in self._read(start_row, end_row)]
+        return _trim(rows)
+
+    def get_all_values(self) -> list:
+        self.backend.api_call("sheets")
+        return self.get_values()
+
+    def row_values(self, row: int) -> list:
+        self.backend.api_call("sheets")
+        values = self.get_values(f"{row}:{row}")
+        return values[0] if values else []
+
+    def _write_cells(self, conn, row_number: int, col: int, values: list) -> None:
+        stored = conn.execute(
+            "SELECT cells FROM local_rows WHERE sheet_id = ? AND tab_name = ? AND row_number = ?",
+            (self.spreadsheet_id, self.title, row_number),
+        ).fetchone()
+        cells = json.loads(stored[0]) if stored else []
+        cells += [""] * (col - 1 + len(values) - len(cells))
+        cells[col - 1:col - 1 + len(values)] = [_cell(v) for v in values]
+        conn.execute(
+            "INSERT OR REPLACE INTO local_rows VALUES (?, ?, ?, ?)",
+            (self.spreadsheet_id, self.title, row_number, json.dumps(cells)),
+        )
+        _bump_version(conn, self.spreadsheet_id)
+
+    def append_row(self, values: list, value_input_option: str = "RAW",
+                   include_values_in_response: bool = False, **kwargs) -> dict:
+        self.backend.api_call("sheets")
+        with self.backend.connect() as conn:
+            last = conn.execute(
+                "SELECT MAX(row_number) FROM local_rows WHERE sheet_id = ? AND tab_name = ?",
+                (self.spreadsheet_id, self.title),
+            ).fetchone()[0] or 0
+            row_number = last + 1
+            self._write_cells(conn, row_number, 1, values)
+        updated = f"'{self.title}'!A{row_number}:{rowcol_to_a1(row_number, max(len(values), 1))}"
+        updates = {"spreadsheetId": self.spreadsheet_id, "updatedRange": updated,
+                   "updatedRows": 1, "updatedColumns": len(values), "updatedCells": len(values)}
+        if include_values_in_response:
+            updates["updatedData"] = {"range": updated, "majorDimension": "ROWS",
+                                      "values": _trim([[_cell(v) for v in values]])}
+        return {
+            "spreadsheetId": self.spreadsheet_id,
+            "tableRange": f"'{self.title}'!A1:{rowcol_to_a1(max(last, 1), max(len(values), 1))}",
+            "updates": updates,
+        }
+
+    def update_cell(self, row: int, col: int, value) -> dict:
+        self.backend.api_call("sheets")
+        with self.backend.connect() as conn:
+            self._write_cells(conn, row, col, [value])
+        return {"updatedRange": f"'{self.title}'!{rowcol_to_a1(row, col)}", "updatedCells": 1}
+
+    def batch_update(self, data: list, include_values_in_response: bool = False, **kwargs) -> dict:
+        self.backend.api_call("sheets")
+        updated, responses = 0, []
+        with self.backend.connect() as conn:
+            for entry in data:
+                # Worksheet-level ranges may omit the tab ("G3") or name it ("'Tab'!G3")
+                grid = a1_range_to_grid_range(entry["range"].rsplit("!", 1)[-1])
+                first_row = grid.get("startRowIndex", 0) + 1
+                first_col = grid.get("startColumnIndex", 0) + 1
+                for offset, row_values in enumerate(entry["values"]):
+                    self._write_cells(conn, first_row + offset, first_col, row_values)
+                    updated += len(row_values)
+                response = {"updatedRange": f"'{self.title}'!{entry['range'].rsplit('!', 1)[-1]}"}
+                if include_values_in_response:
+                    values = _trim([[_cell(v) for v in row] for row in entry["values"]])
+                    response["updatedData"] = {"range": response["updatedRange"], "majorDimension": "ROWS"}
+                    if values:
+                        response["updatedData"]["values"] = values  # Sheets omits "values" for blank cells
+                responses.append(response)
+        return {"spreadsheetId": self.spreadsheet_id, "totalUpdatedCells": updated, "responses": responses}
+
+class LocalSpreadsheet:
+    def __init__(self, backend: LocalBackend, sheet_id: str):
+        self.backend = backend
+        self.id = sheet_id
+
+    def worksheets(self) -> list:
+        self.backend.api_call("sheets")
+        with self.backend.connect() as conn:
+            tabs = conn.execute(
+                "SELECT tab_name FROM local_tabs WHERE sheet_id = ? ORDER BY position", (self.id,)
+            ).fetchall()
+        return [LocalWorksheet(self.backend, self.id, tab) for (tab,) in tabs]
+
+    def worksheet(self, title: str) -> LocalWorksheet:
+        from gspread.exceptions import WorksheetNotFound
+
+        self.backend.api_call("sheets")
+        with self.backend.connect() as conn:
+            found = conn.execute(
+                "SELECT 1 FROM local_tabs WHERE sheet_id = ? AND tab_name = ?", (self.id, title)
+            ).fetchone()
+        if not found:
+            raise WorksheetNotFound(title)
+        return LocalWorksheet(self.backend, self.id, title)
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, **kwargs) -> LocalWorksheet:
+        self.backend.api_call("sheets")
+        with self.backend.connect() as conn:
+            _ensure_tab(conn, self.id, title)
+        return LocalWorksheet(self.backend, self.id, title)
+
+    def values_batch_get(self, ranges: list, params=None) -> dict:
+        self.backend.api_call("sheets")
+        with self.backend.connect() as conn:
+            tabs = {tab for (tab,) in conn.execute("SELECT tab_name FROM local_tabs WHERE sheet_id = ?", (self.id,))}
+
+        value_ranges = []
+        for range_name in ranges:
+            tab, cells = _split_range(range_name)
+            if tab not in tabs:
+                raise sheets_error(400, f"Unable to parse range: {range_name}")
+            values = LocalWorksheet(self.backend, self.id, tab).get_values(cells)
+            entry = {"range": range_name, "majorDimension": "ROWS"}
+            if values:
+                entry["values"] = values
+            value_ranges.append(entry)
+        return {"spreadsheetId": self.id, "valueRanges": value_ranges}
+
+class LocalSheetsClient:
+    def __init__(self, backend: LocalBackend):
+        self.backend = backend
+
+    def open_by_key(self, key: str) -> LocalSpreadsheet:
+        self.backend.api_call("sheets")
+        return LocalSpreadsheet(self.backend, key)
+
+# --- Drive / Docs: googleapiclient resource stand-ins ---
+class _LocalRequest:
+    """Deferred call with googleapiclient's execute(num_retries=...) retry semantics."""
+
+    def __init__(self, backend: LocalBackend, fn):
+        self.backend = backend
+        self.fn = fn
+
+    def execute(self, num_retries: int = 0):
+        from googleapiclient.errors import HttpError
+
+        for attempt in range(num_retries + 1):
+            try:
+                self.backend.api_call("drive")
+                break
+            except HttpError:
+                if attempt == num_retries:
+                    raise
+                time.sleep(min(0.1 * 2 ** attempt, 1.0))
+        return self.fn()
+
+class _LocalUpload(_LocalRequest):
+    """Resumable upload: next_chunk() sends one chunk per (simulated) round trip."""
+
+    def __init__(self, backend: LocalBackend, body: dict, media):
+        super().__init__(backend, self._finish)
+        self.body = body
+        self.media = media
+        self.offset = 0
+        self.buffer = io.BytesIO()
+
+    def next_chunk(self, num_retries: int = 0):
+        from googleapiclient.http import MediaUploadProgress
+
+        _LocalRequest(self.backend, lambda: None).execute(num_retries=num_retries)
+        total = self.media.size()
+        chunk = self.media.getbytes(self.offset, self.media.chunksize())
+        self.buffer.write(chunk)
+        self.offset += len(chunk)
+        if self.offset < total and chunk:
+            return MediaUploadProgress(self.offset, total), None
+        return None, self._finish()
+
+    def execute(self, num_retries: int = 0):
+        response = None
+        while response is None:
+            _, response = self.next_chunk(num_retries=num_retries)
+        return response
+
+    def _finish(self) -> dict:
+        file_id = self.backend.put_file(
+            self.body["name"], self.buffer.getvalue(), self.media.mimetype(), self.body.get("parents", [])
+        )
+        return {"id": file_id}
+
+_QUERY_CLAUSES = [
+    (re.compile(r"^'(.+)' in parents$"), lambda f, m: m.group(1) in f["parents"]),
+    (re.compile(r"^mimeType = '(.+)'$"), lambda f, m: f["mimeType"] == m.group(1)),
+    (re.compile(r"^mimeType != '(.+)'$"), lambda f, m: f["mimeType"] != m.group(1)),
+    (re.compile(r"^name = '(.+)'$"), lambda f, m: f["name"] == m.group(1).replace("\\'", "'")),
+    (re.compile(r"^trashed = (true|false)$"), lambda f, m: f["trashed"] == (m.group(1) == "true")),
+]
+
+def _matcher(q: str | None):
+    tests = []
+    for clause in (q.split(" and ") if q else []):
+        clause = clause.strip()
+        for pattern, test in _QUERY_CLAUSES:
+            match = pattern.match(clause)
+            if match:
+                tests.append((test, match))
+                break
+        else:
+            raise ValueError(f"Local Drive backend does not support query clause: {clause}")
+    return lambda f: all(test(f, match) for test, match in tests)
+
+class _LocalFiles:
+    def __init__(self, backend: LocalBackend):
+        self.backend = backend
+
+    def _meta(self, file_id: str) -> dict:
+        with self.backend.connect() as conn:
+            row = conn.execute(
+                "SELECT id, name, mime_type, parents, md5, size, trashed FROM local_files WHERE id = ?", (file_id,)
+            ).fetchone()
+        if row is None:
+            raise http_error(404, f"File not found: {file_id}")
+        return _file_dict(row)
+
+    def get(self, fileId: str, fields: str | None = None, **kwargs):
+        return _LocalRequest(self.backend, lambda: self._meta(fileId))
+
+    def list(self, q: str | None = None, fields: str | None = None, pageSize: int = 100,
+             pageToken: str | None = None, **kwargs):
+        def run():
+            matches = _matcher(q)
+            with self.backend.connect() as conn:
+                rows = conn.execute(
+                    "SELECT id, name, mime_type, parents, md5, size, trashed FROM local_files ORDER BY created_at, id"
+                ).fetchall()
+            files = [f for f in map(_file_dict, rows) if matches(f)]
+            start = int(pageToken or 0)
+            result = {"files": files[start:start + pageSize]}
+            if start + pageSize < len(files):
+                result["nextPageToken"] = str(start + pageSize)
+            return result
+        return _LocalRequest(self.backend, run)
+
+    def create(self, body: dict, media_body=None, fields: str | None = None, **kwargs):
+        if media_body is not None:
+            return _LocalUpload(self.backend, body, media_body)
+        return _LocalRequest(self.backend, lambda: {"id": self.backend.put_file(
+            body["name"], b"", body.get("mimeType", "application/octet-stream"), body.get("parents", [])
+        )})
+
+    def copy(self, fileId: str, body: dict, **kwargs):
+        def run():
+            source = self._meta(fileId)
+            name = body.get("name", f"Copy of {source['name']}")
+            parents = body.get("parents", source["parents"])
+            return {"id": self.backend.put_file(name, self.backend.read_file(fileId), source["mimeType"], parents)}
+        return _LocalRequest(self.backend, run)
+
+def _file_dict(row) -> dict:
+    file_id, name, mime_type, parents, md5, size, trashed = row
+    meta = {"id": file_id, "name": name, "mimeType": mime_type, "parents": json.loads(parents),
+            "size": str(size), "trashed": bool(trashed)}
+    if mime_type not in (FOLDER_MIME, DOC_MIME):
+        meta["md5Checksum"] = md5
+    return meta
+
+class _LocalBatch:
+    """The whole batch is a single round trip; each request reports through its callback."""
+
+    def __init__(self, backend: LocalBackend, callback=None):
+        self.backend = backend
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id: str | None = None):
+        self.requests.append((request_id or str(len(self.requests) + 1), request, callback))
+
+    def execute(self):
+        from googleapiclient.errors import HttpError
+
+        self.backend.api_call("drive")
+        for request_id, request, callback in self.requests:
+            try:
+                response, exception = request.fn(), None
+            except HttpError as e:
+                response, exception = None, e
+            (callback or self.callback)(request_id, response, exception)
+
+class LocalDriveService:
+    def __init__(self, backend: LocalBackend):
+        self.backend = backend
+
+    def files(self) -> _LocalFiles:
+        return _LocalFiles(self.backend)
+
+    def new_batch_http_request(self, callback=None) -> _LocalBatch:
+        return _LocalBatch(self.backend, callback)
+
+class _LocalDocuments:
+    """Documents are Drive files whose content is their UTF-8 body text."""
+
+    def __init__(self, backend: LocalBackend):
+        self.backend = backend
+
+    def get(self, documentId: str, **kwargs):
+        def run():
+            text = self.backend.read_file(documentId).decode()
+            return {"documentId": documentId, "body": {"content": [{"paragraph": {"elements": [
+                {"textRun": {"content": text}}]}}]}}
+        return _LocalRequest(self.backend, run)
+
+    def batchUpdate(self, documentId: str, body: dict, **kwargs):
+        def run():
+            text = self.backend.read_file(documentId).decode()
+            replies = []
+            for request in body.get("requests", []):
+                replace = request.get("replaceAllText")
+                if replace is None:
+                    raise http_error(400, f"Local Docs backend does not support request: {list(request)}")
+                needle = replace["containsText"]["text"]
+                replies.append({"replaceAllText": {"occurrencesChanged": text.count(needle)}})
+                text = text.replace(needle, replace["replaceText"])
+            with open(self.backend._path(documentId), "wb") as f:
+                f.write(text.encode())
+            return {"documentId": documentId, "replies": replies}
+        return _LocalRequest(self.backend, run)
+
+class LocalDocsService:
+    def __init__(self, backend: LocalBackend):
+        self.backend = backend
+
+    def documents(self) -> _LocalDocuments:
+        return _LocalDocuments(self.backend)
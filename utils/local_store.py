@@ -0,0 +1,22 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+# --- On-disk location for local caches (ledger mirror, queues, indexes) ---
+CACHE_DIR = os.environ.get("OPP_CACHE_DIR", ".cache")
+DB_PATH = os.path.join(CACHE_DIR, "opp.sqlite")
+
+# --- Short-lived connection with commit/rollback and close ---
+@contextmanager
+def connect(path: str = DB_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
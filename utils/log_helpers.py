@@ -1,10 +1,10 @@
-import streamlit as st
 from datetime import date
 import re
 
 from utils.google_sheets import append_row_to_sheet
-from utils.google_drive import upload_file_to_drive
-from utils.config import SHEET_ID, get_drive_folder_id
+from utils.upload_queue import enqueue_receipt, RECEIPT_PENDING
+from utils.config import SHEET_ID
+from utils.tracing import traced
 
 # Optional normalization
 CATEGORY_MAP = {
@@ -85,10 +85,9 @@ def build_expense_payload(
     receipt_link = ""
 
     if receipt_file:
-        folder_id = get_drive_folder_id(expense_date)
-        filename = sanitize_filename(receipt_file.name)
-        file_id = upload_file_to_drive(receipt_file, filename, folder_id)
-        receipt_link = f"https://drive.google.com/file/d/{file_id}/view"
+        # Uploaded in the background by log_expense, which patches the link in afterwards;
+        # the upload job reuses an existing Drive file with the same content
+        receipt_link = RECEIPT_PENDING
 
     normalized_category = CATEGORY_MAP.get(category.strip().lower(), category)
 
@@ -109,8 +108,30 @@ def build_expense_payload(
     ]
     return dict(zip(headers, values))
 
+@traced()
 def log_income(sheet_name: str, row_data: dict):
     append_row_to_sheet(SHEET_ID, sheet_name, row_data)
 
-def log_expense(sheet_name: str, row_data: dict):
-    append_row_to_sheet(SHEET_ID, sheet_name, row_data)
+@traced()
+def log_expense(sheet_name: str, row_data: dict, receipt_file=None, expense_date: date | None = None):
+    row_number = append_row_to_sheet(SHEET_ID, sheet_name, row_data)
+    if receipt_file and row_data.get("Receipt Link") == RECEIPT_PENDING:
+        if row_number is None:
+            # Without the row there is nowhere to write the link; don't leave a silent "pending" behind
+            raise RuntimeError(
+                f"The expense was logged to '{sheet_name}', but Sheets did not report its row, so the "
+                f"receipt was not uploaded. Replace '{RECEIPT_PENDING}' in its Receipt Link cell by hand."
+            )
+        queue_receipt_upload(receipt_file, expense_date or date.today(), sheet_name, row_number)
+
+def queue_receipt_upload(receipt_file, expense_date: date, sheet_name: str, row_number: int) -> str:
+    return enqueue_receipt(
+        data=receipt_file.getvalue(),
+        filename=sanitize_filename(receipt_file.name),
+        mimetype=receipt_file.type,
+        folder_id=None,  # resolved by the upload job, with its retries
+        sheet_id=SHEET_ID,
+        tab_name=sheet_name,
+        row_number=row_number,
+        entry_date=expense_date,
+    )
@@ -0,0 +1,34 @@
+import io
+
+# --- Phone photos are far larger than a legible receipt needs ---
+MAX_DIMENSION = 2000
+JPEG_QUALITY = 80
+COMPRESSIBLE_TYPES = {"image/jpeg", "image/jpg", "image/png"}
+
+# --- Downscale/recompress JPEG and PNG receipts; anything else passes through ---
+def compress_receipt(stream, mimetype: str):
+    """Return (stream, mimetype) ready to upload, keeping the original if it is already smaller."""
+    if mimetype not in COMPRESSIBLE_TYPES:
+        return stream, mimetype
+
+    from PIL import Image, ImageOps
+
+    stream.seek(0)
+    original = stream.read()
+    try:
+        img = ImageOps.exif_transpose(Image.open(io.BytesIO(original)))
+        img.thumbnail((MAX_DIMENSION, MAX_DIMENSION))
+
+        out = io.BytesIO()
+        if mimetype == "image/png":
+            img.save(out, format="PNG", optimize=True)
+        else:
+            img.convert("RGB").save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    except Exception:
+        # Not a readable image after all: upload it untouched
+        return io.BytesIO(original), mimetype
+
+    if out.tell() >= len(original):
+        return io.BytesIO(original), mimetype
+    out.seek(0)
+    return out, mimetype
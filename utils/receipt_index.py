@@ -0,0 +1,54 @@
+import hashlib
+import time
+
+from utils.local_store import connect
+
+# --- md5 of uploaded bytes -> Drive file id (md5 matches Drive's md5Checksum) ---
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS receipt_index (
+    md5 TEXT PRIMARY KEY,
+    file_id TEXT NOT NULL,
+    folder_id TEXT,
+    filename TEXT,
+    indexed_at REAL NOT NULL
+);
+"""
+
+def content_md5(stream) -> str:
+    stream.seek(0)
+    digest = hashlib.md5()
+    for block in iter(lambda: stream.read(1024 * 1024), b""):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+def lookup(md5: str) -> str | None:
+    with connect() as conn:
+        conn.executescript(_SCHEMA)
+        row = conn.execute("SELECT file_id FROM receipt_index WHERE md5 = ?", (md5,)).fetchone()
+    return row[0] if row else None
+
+def record(md5: str, file_id: str, folder_id: str | None = None, filename: str | None = None) -> None:
+    with connect() as conn:
+        conn.executescript(_SCHEMA)
+        conn.execute(
+            "INSERT OR REPLACE INTO receipt_index VALUES (?, ?, ?, ?, ?)",
+            (md5, file_id, folder_id, filename, time.time()),
+        )
+
+def forget(md5: str) -> None:
+    with connect() as conn:
+        conn.executescript(_SCHEMA)
+        conn.execute("DELETE FROM receipt_index WHERE md5 = ?", (md5,))
+
+# --- Replace the index with (md5, file_id, folder_id, filename) rows listed from Drive ---
+def rebuild(entries: list) -> int:
+    now = time.time()
+    with connect() as conn:
+        conn.executescript(_SCHEMA)
+        conn.execute("DELETE FROM receipt_index")
+        conn.executemany(
+            "INSERT OR REPLACE INTO receipt_index VALUES (?, ?, ?, ?, ?)",
+            [(md5, file_id, folder_id, filename, now) for md5, file_id, folder_id, filename in entries],
+        )
+    return len(entries)
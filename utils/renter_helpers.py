@@ -1,7 +1,9 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-from utils.google_sheets import load_sheet_as_df, update_row_in_sheet
+from utils.google_sheets import load_sheet_as_df, update_cells_in_sheet
 from utils.config import SHEET_ID, STATUS_OPTIONS
+from utils.tracing import traced
 
 REQUIRED_COLUMNS = [
     "Check-in", "Name", "Email", "Phone", "Address", "City", "State", "Zip",
@@ -26,7 +28,25 @@ def display_renter_table(df: pd.DataFrame):
     else:
         st.dataframe(df[valid_cols], use_container_width=True)
 
+@traced()
+def diff_edited_cells(original: pd.DataFrame, edited: pd.DataFrame, columns: list) -> list:
+    """Return (row_index, column, new_value) for every cell that differs, compared as text."""
+    rows = original.index.intersection(edited.index)
+    before = original.loc[rows, columns].fillna("").astype(str)
+    after = edited.loc[rows, columns].fillna("").astype(str)
+
+    row_pos, col_pos = np.nonzero(before.to_numpy() != after.to_numpy())
+    return [
+        (rows[r], columns[c], after.iat[r, c])
+        for r, c in zip(row_pos, col_pos)
+    ]
+
 def edit_renter_form(df: pd.DataFrame, sheet_name: str):
+    # Report from the last "Apply Changes"; it is set just before the rerun that reloads the table
+    applied = st.session_state.pop("renter_edit_applied", None)
+    if applied:
+        st.success(applied)
+
     if df.empty:
         return
 
@@ -46,21 +66,21 @@ def edit_renter_form(df: pd.DataFrame, sheet_name: str):
         key="renter_edit"
     )
 
-    # Compare changes
+    # Compare changes and send only the edited cells
     if st.button("✅ Apply Changes"):
-        changes = 0
-        for i in range(len(edited_df)):
-            original = df.loc[i, REQUIRED_COLUMNS]
-            updated = edited_df.loc[i, REQUIRED_COLUMNS]
-            if not original.equals(updated):
-                updates = updated.to_dict()
-                try:
-                    update_row_in_sheet(SHEET_ID, sheet_name, i, updates)
-                    changes += 1
-                except Exception as e:
-                    st.error(f"❌ Row {i + 2} update failed: {e}")
-        if changes:
-            st.success(f"✅ {changes} row(s) updated.")
-            st.rerun()
-        else:
+        cells = diff_edited_cells(df, edited_df, REQUIRED_COLUMNS)
+        if not cells:
             st.info("No changes to apply.")
+            return
+
+        try:
+            rows = update_cells_in_sheet(SHEET_ID, sheet_name, cells, columns=df.columns)
+        except Exception as e:
+            st.error(f"❌ Update failed: {e}")
+            return
+
+        row_labels = ", ".join(str(i + 2) for i in sorted(rows))
+        st.session_state["renter_edit_applied"] = (
+            f"✅ {len(rows)} row(s) updated ({len(cells)} cell(s)): sheet rows {row_labels}."
+        )
+        st.rerun()
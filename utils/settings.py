@@ -0,0 +1,104 @@
+import json
+import os
+import sys
+import tomllib
+
+# --- Settings come from a provider: any object with a .load() -> dict ---
+SECRETS_FILE_ENV = "OPP_SECRETS_FILE"
+ENV_PREFIX = "OPP_"
+
+# Same files Streamlit reads; the project file wins over the user-wide one
+STREAMLIT_SECRETS_PATHS = [
+    os.path.join(os.path.expanduser("~"), ".streamlit", "secrets.toml"),
+    os.path.join(".streamlit", "secrets.toml"),
+]
+
+class DictSettings:
+    def __init__(self, values: dict):
+        self.values = dict(values)
+
+    def load(self) -> dict:
+        return dict(self.values)
+
+class TomlFileSettings:
+    def __init__(self, *paths: str, required: bool = True):
+        self.paths = paths
+        self.required = required
+
+    def load(self) -> dict:
+        values = {}
+        for path in self.paths:
+            if not os.path.exists(path):
+                if self.required:
+                    raise FileNotFoundError(f"Settings file not found: {path}")
+                continue
+            with open(path, "rb") as f:
+                values.update(tomllib.load(f))
+        return values
+
+class StreamlitSettings:
+    """st.secrets, for when the app runs under Streamlit (including hosted secrets)."""
+
+    def load(self) -> dict:
+        import streamlit as st
+
+        try:
+            return st.secrets.to_dict()
+        except FileNotFoundError:
+            return {}
+
+class EnvSettings:
+    """OPP_<KEY> environment variables; values are decoded as JSON when they parse."""
+
+    def __init__(self, prefix: str = ENV_PREFIX):
+        self.prefix = prefix
+
+    def load(self) -> dict:
+        values = {}
+        for key, raw in os.environ.items():
+            if key.startswith(self.prefix) and key != SECRETS_FILE_ENV:
+                try:
+                    values[key[len(self.prefix):].lower()] = json.loads(raw)
+                except ValueError:
+                    values[key[len(self.prefix):].lower()] = raw
+        return values
+
+class LayeredSettings:
+    """Later providers override earlier ones, key by key."""
+
+    def __init__(self, *providers):
+        self.providers = providers
+
+    def load(self) -> dict:
+        values = {}
+        for provider in self.providers:
+            values.update(provider.load())
+        return values
+
+# --- Default chain: secrets file, then environment overrides ---
+def default_provider():
+    path = os.environ.get(SECRETS_FILE_ENV)
+    if path:
+        base = TomlFileSettings(path)
+    elif "streamlit" in sys.modules:
+        base = StreamlitSettings()
+    else:
+        base = TomlFileSettings(*STREAMLIT_SECRETS_PATHS, required=False)
+    return LayeredSettings(base, EnvSettings())
+
+_provider = None
+_settings = None
+
+# --- Install a provider; call before utils.config is first imported ---
+def use_provider(provider) -> None:
+    global _provider, _settings
+    _provider = provider
+    _settings = None
+
+def get_settings() -> dict:
+    global _provider, _settings
+    if _settings is None:
+        if _provider is None:
+            _provider = default_provider()
+        _settings = _provider.load()
+    return _settings
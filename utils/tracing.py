@@ -0,0 +1,187 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# --- One Trace per script rerun; spans from other threads without a trace are dropped ---
+_current_trace = contextvars.ContextVar("opp_trace", default=None)
+_current_span = contextvars.ContextVar("opp_span", default=None)
+
+class Span:
+    __slots__ = ("span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, kind: str, parent_id, attributes: dict):
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+class Trace:
+    def __init__(self, name: str):
+        self.trace_id = os.urandom(16).hex()
+        self.name = name
+        self.started_ns = time.time_ns()
+        self.spans = []
+        self.counters = defaultdict(float)
+        self.cache = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._lock = threading.Lock()
+
+    def add_span(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def cache_event(self, name: str, hit: bool) -> None:
+        with self._lock:
+            self.cache[name]["hits" if hit else "misses"] += 1
+
+    # --- Per-name totals for the diagnostics panel, slowest first ---
+    def span_summary(self) -> list:
+        totals = {}
+        for span in self.spans:
+            entry = totals.setdefault(span.name, {"name": span.name, "calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["calls"] += 1
+            entry["total_ms"] += span.duration_ms
+            entry["max_ms"] = max(entry["max_ms"], span.duration_ms)
+        return sorted(totals.values(), key=lambda e: e["total_ms"], reverse=True)
+
+def start_run(name: str = "rerun") -> Trace:
+    """Begin a fresh trace for this thread's script run and make it current."""
+    trace = Trace(name)
+    _current_trace.set(trace)
+    _current_span.set(None)
+    return trace
+
+def current() -> Trace | None:
+    return _current_trace.get()
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    s = Span(name, kind, parent.span_id if parent else None, attributes)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace.add_span(s)
+
+def traced(name: str | None = None, kind: str = "internal"):
+    """Decorator form of span(); the span is named after the function unless given."""
+    def decorator(func):
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# --- Counters ---
+def count(name: str, value: float = 1) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.count(name, value)
+
+def record_api_call(service: str, bytes_sent: int = 0, bytes_received: int = 0) -> None:
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    trace.count(f"api.{service}.calls")
+    trace.count(f"api.{service}.bytes_sent", bytes_sent)
+    trace.count(f"api.{service}.bytes_received", bytes_received)
+    parent = _current_span.get()
+    if parent is not None:
+        parent.attributes["api.calls"] = parent.attributes.get("api.calls", 0) + 1
+
+def cache_event(name: str, hit: bool) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.cache_event(name, hit)
+
+def api_totals(trace: Trace) -> dict:
+    """{service: {"calls", "bytes_sent", "bytes_received"}} from the api.* counters."""
+    totals = defaultdict(lambda: {"calls": 0, "bytes_sent": 0, "bytes_received": 0})
+    for key, value in trace.counters.items():
+        if key.startswith("api."):
+            _, service, metric = key.split(".", 2)
+            totals[service][metric] = int(value)
+    return dict(totals)
+
+# --- OpenTelemetry (OTLP/JSON) export ---
+_OTEL_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+def _otel_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otel_attributes(attributes: dict) -> list:
+    return [{"key": k, "value": _otel_value(v)} for k, v in attributes.items()]
+
+def to_otel_json(trace: Trace, service_name: str = "opp-finance") -> dict:
+    """The trace as an OTLP ExportTraceServiceRequest; counters go on a root span for this run."""
+    ended_ns = max([s.end_ns for s in trace.spans if s.end_ns] + [time.time_ns()])
+    root_id = os.urandom(8).hex()
+    root_attributes = {k: int(v) if float(v).is_integer() else v for k, v in trace.counters.items()}
+    for name, stats in trace.cache.items():
+        root_attributes[f"cache.{name}.hits"] = stats["hits"]
+        root_attributes[f"cache.{name}.misses"] = stats["misses"]
+
+    spans = [{
+        "traceId": trace.trace_id,
+        "spanId": root_id,
+        "name": trace.name,
+        "kind": _OTEL_KINDS["server"],
+        "startTimeUnixNano": str(trace.started_ns),
+        "endTimeUnixNano": str(ended_ns),
+        "attributes": _otel_attributes(root_attributes),
+        "status": {"code": 1},
+    }]
+    for s in trace.spans:
+        spans.append({
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "parentSpanId": s.parent_id or root_id,
+            "name": s.name,
+            "kind": _OTEL_KINDS.get(s.kind, 1),
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or ended_ns),
+            "attributes": _otel_attributes(s.attributes),
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        })
+
+    return {"resourceSpans": [{
+        "resource": {"attributes": _otel_attributes({"service.name": service_name})},
+        "scopeSpans": [{"scope": {"name": "utils.tracing"}, "spans": spans}],
+    }]}
@@ -0,0 +1,174 @@
+import io
+import os
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from utils.cache import cached
+from utils.local_store import CACHE_DIR, connect
+
+logger = logging.getLogger(__name__)
+
+# --- Receipt bytes wait here until Drive confirms the upload ---
+SPOOL_DIR = os.path.join(CACHE_DIR, "uploads")
+MAX_WORKERS = 2
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 2.0
+
+RECEIPT_PENDING = "Upload pending"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS upload_jobs (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    mimetype TEXT NOT NULL,
+    folder_id TEXT,
+    entry_date TEXT,
+    spool_path TEXT NOT NULL,
+    sheet_id TEXT NOT NULL,
+    tab_name TEXT NOT NULL,
+    row_number INTEGER NOT NULL,
+    link_column TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    file_id TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+# --- Columns added since the table was first created ---
+def _migrate(conn) -> None:
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(upload_jobs)")}
+    if "entry_date" not in columns:
+        conn.execute("ALTER TABLE upload_jobs ADD COLUMN entry_date TEXT")
+
+def _set(job_id: str, **fields) -> None:
+    fields["updated_at"] = time.time()
+    assignments = ", ".join(f"{k} = ?" for k in fields)
+    with connect() as conn:
+        conn.execute(f"UPDATE upload_jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+def _get(job_id: str) -> dict:
+    with connect() as conn:
+        conn.row_factory = lambda cur, row: {d[0]: v for d, v in zip(cur.description, row)}
+        return conn.execute("SELECT * FROM upload_jobs WHERE id = ?", (job_id,)).fetchone()
+
+# --- Upload to Drive, then patch the placeholder cell with the link ---
+def _run_job(job_id: str) -> None:
+    from utils.google_drive import upload_file_to_drive, generate_drive_link, resolve_month_folder
+    from utils.google_sheets import read_cell, update_cells_in_sheet
+
+    job = _get(job_id)
+    if job is None or job["status"] == "done":
+        return
+
+    # Kept across attempts: once Drive has the file, a retry only rewrites the link
+    file_id, folder_id = job["file_id"], job["folder_id"]
+    attempts = job["attempts"]
+    while attempts < MAX_ATTEMPTS:
+        attempts += 1
+        _set(job_id, status="uploading", attempts=attempts)
+        try:
+            if not folder_id and job["entry_date"]:
+                # Month folder lookups hit Drive too, so they get the same retries as the upload
+                folder_id = resolve_month_folder(date.fromisoformat(job["entry_date"]))
+                _set(job_id, folder_id=folder_id)
+            if not file_id:
+                with open(job["spool_path"], "rb") as f:
+                    file_id = upload_file_to_drive(f, job["filename"], folder_id, mimetype=job["mimetype"])
+                _set(job_id, file_id=file_id)
+
+            row_index = job["row_number"] - 2  # header + 0-index offset
+            link = generate_drive_link(file_id)
+            # The row may have moved (sort, delete) since the append; only fill our own placeholder
+            current = read_cell(job["sheet_id"], job["tab_name"], row_index, job["link_column"])
+            if current == RECEIPT_PENDING:
+                update_cells_in_sheet(job["sheet_id"], job["tab_name"], [(row_index, job["link_column"], link)])
+            elif current != link:
+                _set(job_id, status="failed", error=(
+                    f"Row {job['row_number']} no longer says '{RECEIPT_PENDING}' (found '{current}'); "
+                    f"the row moved or was edited. Add the link by hand: {link}"
+                ))
+                return
+
+            _set(job_id, status="done", error=None)
+            os.remove(job["spool_path"])
+            return
+        except Exception as e:
+            logger.warning("Receipt upload %s failed (attempt %d)", job_id, attempts, exc_info=True)
+            _set(job_id, status="pending", error=f"{type(e).__name__}: {e}")
+            if attempts < MAX_ATTEMPTS:
+                time.sleep(RETRY_BASE_DELAY * 2 ** (attempts - 1))
+
+    _set(job_id, status="failed")
+
+# --- Worker pool; unfinished jobs from a previous process are picked up on start ---
+@cached(resource=True)
+def get_worker_pool() -> ThreadPoolExecutor:
+    pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="receipt-upload")
+    with connect() as conn:
+        conn.executescript(_SCHEMA)
+        _migrate(conn)
+        unfinished = conn.execute(
+            "SELECT id FROM upload_jobs WHERE status IN ('pending', 'uploading') ORDER BY created_at"
+        ).fetchall()
+    for (job_id,) in unfinished:
+        pool.submit(_run_job, job_id)
+    return pool
+
+# --- Persist the receipt and queue it; returns the job id ---
+def enqueue_receipt(
+    data: bytes,
+    filename: str,
+    mimetype: str,
+    folder_id: str | None,
+    sheet_id: str,
+    tab_name: str,
+    row_number: int,
+    link_column: str = "Receipt Link",
+    entry_date: date | None = None,
+) -> str:
+    """Without a folder_id, the job resolves the entry_date's month folder itself."""
+    pool = get_worker_pool()
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    job_id = uuid.uuid4().hex
+    spool_path = os.path.join(SPOOL_DIR, job_id)
+    with open(spool_path, "wb") as f:
+        f.write(data)
+
+    now = time.time()
+    with connect() as conn:
+        conn.execute(
+            "INSERT INTO upload_jobs (id, filename, mimetype, folder_id, entry_date, spool_path, sheet_id, "
+            "tab_name, row_number, link_column, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending', ?, ?)",
+            (job_id, filename, mimetype, folder_id, entry_date.isoformat() if entry_date else None,
+             spool_path, sheet_id, tab_name, row_number, link_column, now, now),
+        )
+    pool.submit(_run_job, job_id)
+    return job_id
+
+# --- Put failed jobs back on the queue (their receipts are still spooled) ---
+def retry_failed() -> int:
+    pool = get_worker_pool()
+    with connect() as conn:
+        failed = conn.execute("SELECT id FROM upload_jobs WHERE status = 'failed'").fetchall()
+        conn.execute("UPDATE upload_jobs SET status = 'pending', attempts = 0 WHERE status = 'failed'")
+    for (job_id,) in failed:
+        pool.submit(_run_job, job_id)
+    return len(failed)
+
+# --- Most recent jobs, newest first, for the status panel ---
+def list_jobs(limit: int = 10) -> list:
+    get_worker_pool()
+    with connect() as conn:
+        conn.row_factory = lambda cur, row: {d[0]: v for d, v in zip(cur.description, row)}
+        return conn.execute(
+            "SELECT filename, tab_name, row_number, status, attempts, error, updated_at "
+            "FROM upload_jobs ORDER BY created_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
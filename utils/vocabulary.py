@@ -0,0 +1,67 @@
+import pandas as pd
+
+from utils.cache import cached
+from utils.google_sheets import load_sheet_as_df
+from utils.tracing import traced
+
+# --- Columns with at most this many distinct values get a vocabulary (form dropdowns) ---
+MAX_DISTINCT = 100
+
+@traced()
+def build_vocabulary(df: pd.DataFrame, max_distinct: int = MAX_DISTINCT) -> dict:
+    """{column: {value: [count, last_row]}} for every low-cardinality column; blank cells are skipped.
+
+    Each column is scanned on its own (a value_counts and a last-occurrence pass), so the cost
+    is a few vectorised passes per column, not a single scan of the frame."""
+    vocabulary = {}
+    for col in df.columns.unique():
+        series = df[col]
+        if isinstance(series, pd.DataFrame):
+            continue  # duplicated header; dropdowns can't tell the columns apart
+        values = series.fillna("").astype(str).str.strip()
+        values = values[values != ""]
+        counts = values.value_counts()
+        if counts.empty or len(counts) > max_distinct:
+            continue
+        last = values[~values.duplicated(keep="last")]
+        last_row = dict(zip(last.to_numpy(), last.index))
+        vocabulary[col] = {value: [int(count), int(last_row[value])] for value, count in counts.items()}
+    return vocabulary
+
+def add_row(vocabulary: dict, row: dict, row_index: int) -> dict:
+    """The vocabulary with one more row counted; values new to an indexed column are added."""
+    updated = {}
+    for col, entries in vocabulary.items():
+        value = str(row.get(col, "") or "").strip()
+        if value:
+            count = entries[value][0] if value in entries else 0
+            entries = {**entries, value: [count + 1, row_index]}
+        updated[col] = entries
+    return updated
+
+def ranked(vocabulary: dict, column: str) -> list:
+    """A column's values, most used first; ties go to the most recently used."""
+    entries = vocabulary.get(column, {})
+    return sorted(entries, key=lambda value: (-entries[value][0], -entries[value][1], value))
+
+# --- One index per tab, built from the cached frame and kept current by utils.write_through ---
+@cached(ttl=300)
+def load_vocabulary(sheet_id: str, tab_name: str) -> dict:
+    return build_vocabulary(load_sheet_as_df(sheet_id, tab_name))
+
+def get_choices(sheet_id: str, tab_name: str, column: str) -> list:
+    """Dropdown options for a form; empty when the tab can't be loaded or the column is blank.
+
+    A column left out of the index (too many distinct values, or a repeated header) falls back
+    to its sorted distinct values, read from the same cached frame."""
+    try:
+        vocabulary = load_vocabulary(sheet_id, tab_name)
+        if column in vocabulary:
+            return ranked(vocabulary, column)
+        df = load_sheet_as_df(sheet_id, tab_name)
+        if column not in df.columns:
+            return []
+        values = df.loc[:, [column]].stack().astype(str).str.strip()
+        return sorted(set(values[values != ""]))
+    except Exception:
+        return []
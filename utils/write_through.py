@@ -0,0 +1,130 @@
+import re
+import pandas as pd
+
+from utils import ledger_mirror
+from utils.aggregates import load_cube
+from utils.config import YEARS
+from utils.google_sheets import get_header_map, get_sheet_version, load_sheet_as_df, load_sheets_as_dfs
+from utils.ledger import load_ledger, load_ledgers
+from utils.vocabulary import add_row, load_vocabulary
+
+# --- Keep caches in step with the app's own writes (called by the google_sheets write helpers) ---
+class _Unpatchable(Exception):
+    """A cached frame doesn't line up with the write; that entry is dropped instead."""
+
+def _year_tabs(years) -> tuple:
+    return tuple(tab for year in years for tab in (f"{year} OPP Income", f"{year} OPP Expenses"))
+
+def _year_of(tab_name: str) -> str | None:
+    return next((year for year in YEARS if tab_name in _year_tabs((year,))), None)
+
+# --- Every tab tuple a tab's frame is cached under: alone, with its year, with all years ---
+def _frame_keys(tab_name: str) -> list:
+    keys = [(tab_name,)]
+    year = _year_of(tab_name)
+    if year:
+        keys += [_year_tabs((year,)), _year_tabs(YEARS)]
+    return list(dict.fromkeys(keys))
+
+def _patch_frames(sheet_id: str, tab_name: str, patch) -> None:
+    """Apply patch(df) -> df to every cached raw frame of the tab; entries it can't patch are dropped."""
+    def patch_dict(dfs: dict) -> dict:
+        return {**dfs, tab_name: patch(dfs[tab_name])}
+
+    try:
+        load_sheet_as_df.update(patch, sheet_id, tab_name)
+    except _Unpatchable:
+        load_sheet_as_df.invalidate(sheet_id, tab_name)
+    for key in _frame_keys(tab_name):
+        try:
+            load_sheets_as_dfs.update(patch_dict, sheet_id, key)
+        except _Unpatchable:
+            load_sheets_as_dfs.invalidate(sheet_id, key)
+
+# --- Typed ledgers and cubes are rebuilt from the patched frames (no network) on next use ---
+def _invalidate_derived(tab_name: str) -> None:
+    year = _year_of(tab_name)
+    if not year:
+        return
+    load_ledger.invalidate(year)
+    load_ledgers.invalidate((year,))
+    load_ledgers.invalidate(tuple(YEARS))
+    load_cube.invalidate(year)
+
+def _invalidate_frames(sheet_id: str, tab_name: str) -> None:
+    load_sheet_as_df.invalidate(sheet_id, tab_name)
+    for key in _frame_keys(tab_name):
+        load_sheets_as_dfs.invalidate(sheet_id, key)
+    load_vocabulary.invalidate(sheet_id, tab_name)
+
+def invalidate_tab(sheet_id: str, tab_name: str) -> None:
+    """Drop every cached copy of the tab and force a full resync of its mirror."""
+    ledger_mirror.mark_dirty(sheet_id, tab_name)
+    _invalidate_frames(sheet_id, tab_name)
+    _invalidate_derived(tab_name)
+
+# --- The mirror holds our write: keep it current at the sheet's new version (no download on next sync) ---
+def _advance_version(sheet_id: str, before: str | None) -> None:
+    if before is not None:
+        ledger_mirror.advance_version(sheet_id, before, get_sheet_version(sheet_id))
+
+# --- values.append: add the row as Sheets rendered it to the mirror and cached frames ---
+def _append(df: pd.DataFrame, start: int, rows: list) -> pd.DataFrame:
+    if len(df) != start or not len(df.columns):
+        raise _Unpatchable()  # cached before rows that the mirror has since picked up
+    width = len(df.columns)
+    new = pd.DataFrame(
+        [(list(row) + [""] * width)[:width] for row in rows],
+        columns=df.columns,
+        index=pd.RangeIndex(start, start + len(rows)),
+    )
+    return pd.concat([df, new])
+
+def after_append(sheet_id: str, tab_name: str, response: dict, before: str | None = None) -> None:
+    """before: the sheet's version just before the write, if the tab's mirror was complete at it."""
+    updates = (response or {}).get("updates", {})
+    match = re.search(r"![A-Z]+(\d+)", updates.get("updatedRange", ""))
+    rows = updates.get("updatedData", {}).get("values") or [[]]
+    start = ledger_mirror.append_rows(sheet_id, tab_name, int(match.group(1)), rows) if match else None
+    if start is None:
+        # Can't tell exactly where the row landed: drop the frames; the next sync's tail probe picks it up
+        _invalidate_frames(sheet_id, tab_name)
+    else:
+        _advance_version(sheet_id, before)
+        _patch_frames(sheet_id, tab_name, lambda df: _append(df, start, rows))
+        header_map = get_header_map(sheet_id, tab_name)
+        for offset, row in enumerate(rows):
+            row_dict = {col: row[nums[0] - 1] if nums[0] <= len(row) else "" for col, nums in header_map.items()}
+            load_vocabulary.update(lambda vocabulary: add_row(vocabulary, row_dict, start + offset),
+                                   sheet_id, tab_name)
+    _invalidate_derived(tab_name)
+
+# --- values.batchUpdate: set the edited cells (as rendered) in the mirror and cached frames ---
+def _set_cells(df: pd.DataFrame, cells: list) -> pd.DataFrame:
+    if any(row not in df.index or col not in df.columns for row, col, _ in cells):
+        raise _Unpatchable()
+    df = df.copy()
+    for row, col, value in cells:
+        df.at[row, col] = value
+    return df
+
+def _rendered(response: dict) -> str:
+    # Sheets leaves "values" out when the written cell renders blank
+    values = response["updatedData"].get("values") or [[]]
+    return values[0][0] if values[0] else ""
+
+def after_update(sheet_id: str, tab_name: str, written: list, response: dict, before: str | None = None) -> None:
+    """written: (row_index, column) per range sent, in request order; before as for after_append."""
+    responses = (response or {}).get("responses", [])
+    if len(responses) != len(written) or not all("updatedData" in r for r in responses):
+        invalidate_tab(sheet_id, tab_name)
+        return
+
+    cells = [(row, col, _rendered(r)) for (row, col), r in zip(written, responses)]
+    if not ledger_mirror.update_cells(sheet_id, tab_name, cells):
+        invalidate_tab(sheet_id, tab_name)
+        return
+    _advance_version(sheet_id, before)
+    _patch_frames(sheet_id, tab_name, lambda df: _set_cells(df, cells))
+    load_vocabulary.invalidate(sheet_id, tab_name)  # rebuilt from the patched frame, no fetch
+    _invalidate_derived(tab_name)